@@ -0,0 +1,114 @@
+"""
+Rough benchmarks for the hot paths in main.py, run with `python benchmark.py`.
+These use synthetic data, so don't need network access.
+"""
+import datetime
+import random
+import timeit
+import tracemalloc
+from typing import Callable, List
+
+from bs4 import BeautifulSoup
+
+from main import Event, EventType, day_card_strainer, event_order_key, lxml
+
+CARD_HTML = (
+    '<div class="card card--day"><div class="card__date"><div class="date_day">{date}</div></div>'
+    '<div class="card__content"><p>All about the day, with <b>some</b> <a href="/tags/{n}">tags</a></p></div>'
+    '<div class="card__title heading"><a href="https://www.daysoftheyear.com/days/day-{n}/">Day {n}</a></div></div>'
+)
+CARD_DATES = ["Tue Aug 2nd, 2022", "Thu Jul 28th, 2022 - Sat Aug 6th, 2022", "August, 2022"]
+
+
+def daysoftheyear_page(cards: int = 40, padding: int = 300) -> str:
+    """
+    Makes a page shaped like a daysoftheyear listing: a few day cards surrounded by navigation, adverts and scripts
+    """
+    nav = "".join(f'<li class="menu-item"><a href="/menu/{n}">Menu item {n}</a></li>' for n in range(padding))
+    adverts = "".join(
+        f'<div class="advert"><script>window.ad{n} = {{"slot": {n}}};</script><iframe src="/ad/{n}"></iframe></div>'
+        for n in range(padding // 4)
+    )
+    day_cards = "".join(CARD_HTML.format(date=CARD_DATES[n % len(CARD_DATES)], n=n) for n in range(cards))
+    return (
+        f"<html><head><script>{'var x = 1;' * 2000}</script><style>{'.a {color: red}' * 500}</style></head>"
+        f"<body><nav><ul>{nav}</ul></nav>{adverts}<main>{day_cards}</main><footer><ul>{nav}</ul></footer></body></html>"
+    )
+
+
+def best_time(func: Callable, number: int = 10, repeat: int = 5) -> float:
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def peak_memory(func: Callable) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark_day_card_parse() -> None:
+    html = daysoftheyear_page()
+    print(f"Day card parsing, {len(html) // 1024} KiB page with 40 day cards")
+    features_list = ["html.parser"] + (["lxml"] if lxml is not None else [])
+    for features in features_list:
+        for label, parse_only in [("full", None), ("strained", day_card_strainer)]:
+            def parse() -> BeautifulSoup:
+                return BeautifulSoup(html, features, parse_only=parse_only)
+            tree_size = len(parse().find_all(True))
+            print(
+                f"  {features:<12} {label:<9} {tree_size:>5} tags, {best_time(parse) * 1000:7.2f} ms, "
+                f"{peak_memory(parse) // 1024:>5} KiB peak"
+            )
+
+
+class BenchmarkSource:
+    # Events only read their source's name and weight, so nothing needs fetching
+    name = "BenchmarkSource"
+    weight = 10
+
+
+def make_events(count: int) -> List[Event]:
+    sources = [BenchmarkSource(), BenchmarkSource()]
+    event_types = list(EventType)
+    return [
+        Event(
+            sources[n % 2],
+            datetime.date(1000 + n % 1000, 8, 2),
+            f"Event number {n}",
+            f"https://en.wikipedia.org/wiki/Event_{n}",
+            event_types[n % len(event_types)],
+            datetime.date(1000 + n % 1000, 8, 9) if n % 10 == 0 else None,
+        )
+        for n in range(count)
+    ]
+
+
+def benchmark_event_memory(count: int = 100_000) -> None:
+    tracemalloc.start()
+    try:
+        events = make_events(count)
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    print(f"Event memory, {len(events)} events")
+    print(f"  {size // 1024} KiB, {size / count:.0f} bytes per event including its strings and dates")
+
+
+def benchmark_event_sort(count: int = 100_000) -> None:
+    events = make_events(count)
+    random.Random(0).shuffle(events)
+    print(f"Event sorting, {len(events)} events")
+    for label, sort in [
+        ("comparisons", lambda: sorted(events)),
+        ("key=", lambda: sorted(events, key=event_order_key)),
+    ]:
+        print(f"  {label:<12} {best_time(sort, number=1, repeat=3) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    benchmark_day_card_parse()
+    benchmark_event_memory()
+    benchmark_event_sort()
@@ -25,16 +25,810 @@
   - An example in use: https://www.flickr.com/photos/zarfo/24073155478/in/album-72157688351121374/
 - Might be good to do it on Telegram actually, so I can give it in standups where I run into the office
 """
+from __future__ import annotations
+
+import asyncio
+import calendar
+import collections
+import codecs
+import concurrent.futures
+import contextlib
 import datetime
-from functools import total_ordering
-from ABC import ABC, abstractmethod
+import email.utils
+import hashlib
+import heapq
+import itertools
+import json
+import logging
+import math
+import os
+import random
+import re
+import sqlite3
+import struct
+import sys
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from enum import Enum
+from functools import lru_cache, partial, total_ordering
+from operator import attrgetter
+from typing import (
+    Any, AsyncIterator, Awaitable, BinaryIO, Callable, Collection, Dict, Iterable, Iterator, List, Mapping, NamedTuple,
+    Optional, Tuple, Union,
+)
+from urllib.parse import urljoin, urlsplit
 
+import aiohttp
 import requests
-import dateutil
-from bs4 import BeautifulSoup
+import requests.adapters
+import dateutil.parser
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml
+except ImportError:
+    lxml = None
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+except ImportError:
+    SelectolaxParser = None
+
+logger = logging.getLogger(__name__)
+
+
+class HttpResponse:
+    """
+    A successful response body, either fresh from the server or loaded from the ResponseCache.
+    not_modified is set when the server answered a conditional request with 304, meaning the body is unchanged since it
+    was cached.
+    Streamed responses have chunks (or async_chunks) set, which can be read once through iter_content (or
+    aiter_content) without holding the whole body in memory. raw_response is the response they are read from, which
+    close releases even if the chunks were never started.
+    """
+    chunk_size = 64 * 1024
+
+    def __init__(
+        self,
+        url: str,
+        content: Optional[bytes] = None,
+        encoding: Optional[str] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        not_modified: bool = False,
+        content_path: Optional[str] = None,
+    ) -> None:
+        self.url = url
+        self._content = content
+        self._content_path = content_path
+        self.encoding = encoding
+        self.etag = etag
+        self.last_modified = last_modified
+        self.not_modified = not_modified
+        self.chunks: Optional[Iterator[bytes]] = None
+        self.async_chunks: Optional[AsyncIterator[bytes]] = None
+        self.raw_response: Optional[Union[requests.Response, aiohttp.ClientResponse]] = None
+
+    @property
+    def validator(self) -> Optional[Tuple[Optional[str], Optional[str]]]:
+        """
+        Identifies this version of the response body, if the server gave enough information to do so
+        """
+        if self.etag is None and self.last_modified is None:
+            return None
+        return self.etag, self.last_modified
+
+    @property
+    def content(self) -> bytes:
+        # Cached bodies are only read from disk if something actually needs them
+        if self._content is None and (self._content_path is not None or self.chunks is not None):
+            self._content = b"".join(self.iter_content())
+        return self._content
+
+    def iter_content(self) -> Iterator[bytes]:
+        if self.chunks is not None:
+            chunks, self.chunks = self.chunks, None
+            with contextlib.closing(chunks):
+                yield from chunks
+        elif self._content is None and self._content_path is not None:
+            with open(self._content_path, "rb") as f:
+                while chunk := f.read(self.chunk_size):
+                    yield chunk
+        else:
+            yield self.content
+
+    async def aiter_content(self) -> AsyncIterator[bytes]:
+        if self.async_chunks is not None:
+            chunks, self.async_chunks = self.async_chunks, None
+            try:
+                async for chunk in chunks:
+                    yield chunk
+            finally:
+                await chunks.aclose()
+        else:
+            for chunk in self.iter_content():
+                yield chunk
+
+    def close(self) -> None:
+        """
+        Releases the connection behind a streamed response which is not going to be read
+        """
+        if self.chunks is not None:
+            self.chunks.close()
+            self.chunks = None
+        # Closing a generator which never started doesn't run its cleanup, so release the connection directly
+        if self.raw_response is not None:
+            raw_response, self.raw_response = self.raw_response, None
+            if isinstance(raw_response, requests.Response):
+                # Reading the rest of the body lets the connection go back to the pool, rather than being dropped
+                with contextlib.suppress(Exception):
+                    raw_response.raw.drain_conn()
+                raw_response.close()
+            else:
+                raw_response.release()
+
+    async def aclose(self) -> None:
+        if self.async_chunks is not None:
+            await self.async_chunks.aclose()
+            self.async_chunks = None
+        if isinstance(self.raw_response, aiohttp.ClientResponse):
+            with contextlib.suppress(Exception):
+                await self.raw_response.read()
+        self.close()
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+
+class ResponseCache:
+    """
+    Disk-backed store of response bodies along with their ETag and Last-Modified headers, so that they can be
+    revalidated with conditional requests rather than downloaded again.
+    """
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(url.encode()).hexdigest())
+
+    def load(self, url: str) -> Optional[HttpResponse]:
+        path = self._path(url)
+        try:
+            with open(path + ".json", "r") as f:
+                metadata = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if metadata.get("url") != url or not os.path.exists(path + ".body"):
+            return None
+        return HttpResponse(
+            url,
+            encoding=metadata.get("encoding"),
+            etag=metadata.get("etag"),
+            last_modified=metadata.get("last_modified"),
+            content_path=path + ".body",
+        )
+
+    def store(self, response: HttpResponse) -> None:
+        if response.validator is None:
+            # Nothing to revalidate against
+            return
+        path = self._path(response.url)
+        metadata = {
+            "url": response.url,
+            "encoding": response.encoding,
+            "etag": response.etag,
+            "last_modified": response.last_modified,
+        }
+        # Write to temporary files and move them into place, so readers never see a half written entry
+        self._write_atomic(path + ".body", response.content)
+        self._write_atomic(path + ".json", json.dumps(metadata).encode())
+
+    def store_chunks(self, response: HttpResponse, chunks: Iterator[bytes]) -> Iterator[bytes]:
+        """
+        Passes through the chunks of a streamed response, storing them once the whole body has been read
+        """
+        if response.validator is None:
+            yield from chunks
+            return
+        body_path = self._path(response.url) + ".body"
+        tmp_path = self._tmp_path(body_path)
+        with contextlib.closing(chunks), self._stored_body(response, tmp_path, body_path) as f:
+            for chunk in chunks:
+                f.write(chunk)
+                yield chunk
+
+    async def store_chunks_async(self, response: HttpResponse, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        if response.validator is None:
+            async for chunk in chunks:
+                yield chunk
+            return
+        body_path = self._path(response.url) + ".body"
+        tmp_path = self._tmp_path(body_path)
+        try:
+            with self._stored_body(response, tmp_path, body_path) as f:
+                async for chunk in chunks:
+                    f.write(chunk)
+                    yield chunk
+        finally:
+            await chunks.aclose()
+
+    @contextlib.contextmanager
+    def _stored_body(self, response: HttpResponse, tmp_path: str, body_path: str) -> Iterator[BinaryIO]:
+        """
+        Opens a temporary file for the body, which only gets stored if it is written without interruption
+        """
+        try:
+            with open(tmp_path, "wb") as f:
+                yield f
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+            raise
+        os.replace(tmp_path, body_path)
+        metadata = {
+            "url": response.url,
+            "encoding": response.encoding,
+            "etag": response.etag,
+            "last_modified": response.last_modified,
+        }
+        self._write_atomic(self._path(response.url) + ".json", json.dumps(metadata).encode())
+
+    @staticmethod
+    def _tmp_path(path: str) -> str:
+        # Unique per write, as coroutines on the same thread can be storing the same url at once
+        return f"{path}.{uuid.uuid4().hex}.tmp"
+
+    @classmethod
+    def _write_atomic(cls, path: str, data: bytes) -> None:
+        tmp_path = cls._tmp_path(path)
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def conditional_headers(cached: Optional[HttpResponse]) -> Dict[str, str]:
+        headers = {}
+        if cached is not None:
+            if cached.etag is not None:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified is not None:
+                headers["If-Modified-Since"] = cached.last_modified
+        return headers
+
+
+class RateLimiter:
+    """
+    Spaces out requests to each host with a token bucket, shared by every source using the same HttpClient. Requests
+    beyond the burst are each given the next free slot in the order they arrive, so queued requests are served fairly
+    and the host sees a steady rate rather than bursts of retries. A host which answers with Retry-After is left alone
+    until then.
+    """
+    def __init__(
+        self,
+        rate: float = 5,
+        burst: int = 5,
+        host_rates: Optional[Dict[str, Tuple[float, int]]] = None,
+        max_throttled_retries: int = 3,
+        max_retry_after: float = 300,
+    ) -> None:
+        """
+        :param rate: How many requests to send to each host per second, once the burst is used up
+        :param burst: How many requests can be sent to a host at once after it has been idle
+        :param host_rates: The (rate, burst) for hosts which need different limits
+        :param max_throttled_retries: How many times to retry a request which the host answered with Retry-After
+        :param max_retry_after: The longest Retry-After to wait for, in seconds
+        """
+        self.rate = rate
+        self.burst = burst
+        self.host_rates = host_rates or {}
+        self.max_throttled_retries = max_throttled_retries
+        self.max_retry_after = max_retry_after
+        self._lock = threading.Lock()
+        # The time each host's bucket will next be empty, and the time any Retry-After from it runs out
+        self._bucket_empty_times: Dict[str, float] = {}
+        self._held_until: Dict[str, float] = {}
+
+    def reserve(self, url: str) -> float:
+        """
+        Takes the next token for the url's host, returning how many seconds to wait before sending the request
+        """
+        host = urlsplit(url).netloc
+        rate, burst = self.host_rates.get(host, (self.rate, self.burst))
+        interval = 1 / rate
+        now = time.monotonic()
+        with self._lock:
+            bucket_empty_time = max(self._bucket_empty_times.get(host, now), now)
+            send_time = max(now, bucket_empty_time - (burst - 1) * interval, self._held_until.get(host, now))
+            self._bucket_empty_times[host] = max(bucket_empty_time, send_time) + interval
+        return send_time - now
+
+    def acquire(self, url: str) -> None:
+        # If the host asked for a break while the request was queued, it is queued again for after the break
+        while True:
+            time.sleep(self.reserve(url))
+            if self._hold_remaining(url) <= 0:
+                return
+
+    async def acquire_async(self, url: str) -> None:
+        while True:
+            await asyncio.sleep(self.reserve(url))
+            if self._hold_remaining(url) <= 0:
+                return
+
+    def hold(self, url: str, seconds: float) -> None:
+        """
+        Stops any more requests being sent to the url's host for the given number of seconds
+        """
+        host = urlsplit(url).netloc
+        held_until = time.monotonic() + min(seconds, self.max_retry_after)
+        with self._lock:
+            self._held_until[host] = max(self._held_until.get(host, 0), held_until)
+
+    def _hold_remaining(self, url: str) -> float:
+        with self._lock:
+            held_until = self._held_until.get(urlsplit(url).netloc, 0)
+        return max(0.0, held_until - time.monotonic())
+
+
+class RetryPolicy:
+    """
+    How HttpClient retries requests which failed in a way that may well pass next time: timeouts, dropped connections
+    and server errors. Retries back off exponentially with full jitter, so clients which failed together spread out
+    rather than all retrying at once.
+    """
+    retry_statuses = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(self, retries: int = 2, backoff: float = 0.5, max_backoff: float = 10) -> None:
+        """
+        :param retries: How many times to retry a request
+        :param backoff: The longest wait before the first retry, in seconds, doubling for each retry after it
+        :param max_backoff: The longest wait before any retry, including waits the server asks for with Retry-After
+        """
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def delay(self, retries: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """
+        How many seconds to wait before the next retry, after the given number of them, or None to give up
+        """
+        if retries >= self.retries:
+            return None
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_backoff else None
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** retries))
+
+
+class HttpClient:
+    """
+    HTTP sessions shared between sources, so that connections to each host are pooled and kept alive between requests
+    rather than a new TCP and TLS connection being opened for every fetch.
+    """
+    # How many recent requests to each host to work out the hedge percentile from, and how many are needed to start
+    latency_samples = 100
+    min_hedge_samples = 20
+
+    def __init__(
+        self,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        keepalive_timeout: float = 30,
+        response_cache: Optional[ResponseCache] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        timeout: Optional[float] = 30,
+        retry_policy: Optional[RetryPolicy] = None,
+        hedge_percentile: Optional[float] = None,
+    ) -> None:
+        """
+        :param pool_connections: How many hosts to keep connection pools for
+        :param pool_maxsize: How many connections to keep open to each host
+        :param keepalive_timeout: How long to keep idle connections open for, in seconds (async session only)
+        :param response_cache: If given, responses are cached there and revalidated with conditional requests
+        :param rate_limiter: If given, requests to each host are spaced out by it, and throttled ones retried
+        :param timeout: How long to wait to connect, and then for each read from the connection, in seconds
+        :param retry_policy: How to retry failed requests. Defaults to RetryPolicy()
+        :param hedge_percentile: If given, a request taking longer than this percentile of recent requests to the same
+            host took is sent again, and whichever copy answers first is used
+        """
+        self.response_cache = response_cache
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.hedge_percentile = hedge_percentile
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.keepalive_timeout = keepalive_timeout
+        self._session: Optional[requests.Session] = None
+        self._session_lock = threading.Lock()
+        self._async_session: Optional[aiohttp.ClientSession] = None
+        self._async_session_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Recent time to response for each host, to work out when to hedge
+        self._latencies: Dict[str, collections.deque] = {}
+        self._latencies_lock = threading.Lock()
+        self._hedge_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+    @property
+    def session(self) -> requests.Session:
+        with self._session_lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=self.pool_connections,
+                    pool_maxsize=self.pool_maxsize,
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._session = session
+            return self._session
+
+    @property
+    def async_session(self) -> aiohttp.ClientSession:
+        """
+        The aiohttp session for the running event loop. aiohttp sessions cannot be shared between event loops, so a new
+        one is created if the loop has changed.
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_session is None or self._async_session.closed or self._async_session_loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_connections * self.pool_maxsize,
+                limit_per_host=self.pool_maxsize,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._async_session = aiohttp.ClientSession(connector=connector)
+            self._async_session_loop = loop
+        return self._async_session
+
+    def get(self, url: str, stream: bool = False) -> HttpResponse:
+        """
+        Fetches the url, revalidating any cached copy of it. If stream is set, the body is only downloaded as the
+        response's chunks are read.
+        """
+        cached = self.response_cache.load(url) if self.response_cache else None
+        resp = self._send(url, ResponseCache.conditional_headers(cached), stream)
+        if resp.status_code == 304 and cached is not None:
+            resp.close()
+            cached.not_modified = True
+            return cached
+        if not resp.ok:
+            resp.close()
+            resp.raise_for_status()
+        response = HttpResponse(
+            url,
+            None if stream else resp.content,
+            encoding=_charset(resp.headers.get("Content-Type")),
+            etag=resp.headers.get("ETag"),
+            last_modified=resp.headers.get("Last-Modified"),
+        )
+        if stream:
+            response.raw_response = resp
+            response.chunks = _iter_response_chunks(resp)
+            if self.response_cache is not None:
+                response.chunks = self.response_cache.store_chunks(response, response.chunks)
+        elif self.response_cache is not None:
+            self.response_cache.store(response)
+        return response
+
+    async def get_async(self, url: str, stream: bool = False) -> HttpResponse:
+        cached = self.response_cache.load(url) if self.response_cache else None
+        resp = await self._send_async(url, ResponseCache.conditional_headers(cached))
+        if resp.status == 304 and cached is not None:
+            resp.release()
+            cached.not_modified = True
+            return cached
+        if not resp.ok:
+            resp.release()
+            resp.raise_for_status()
+        response = HttpResponse(
+            url,
+            encoding=resp.charset,
+            etag=resp.headers.get("ETag"),
+            last_modified=resp.headers.get("Last-Modified"),
+        )
+        response.raw_response = resp
+        response.async_chunks = _aiter_response_chunks(resp)
+        if self.response_cache is not None:
+            response.async_chunks = self.response_cache.store_chunks_async(response, response.async_chunks)
+        if not stream:
+            response = HttpResponse(
+                url,
+                b"".join([chunk async for chunk in response.aiter_content()]),
+                encoding=response.encoding,
+                etag=response.etag,
+                last_modified=response.last_modified,
+            )
+        return response
+
+    def _send(self, url: str, headers: Dict[str, str], stream: bool = False) -> requests.Response:
+        """
+        Sends the request once the rate limiter allows, retrying it if it fails in a way that may well pass next time.
+        Throttled requests wait for as long as the host asks, and other failures back off as the retry policy says.
+        """
+        retries = throttled_retries = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(url)
+            try:
+                resp = self._send_hedged(url, headers, stream)
+            except (requests.ConnectionError, requests.Timeout) as error:
+                delay = self.retry_policy.delay(retries)
+                if delay is None:
+                    raise
+                logger.info("Request to %s failed with %r, retrying in %.1f seconds", url, error, delay)
+            else:
+                retry_after = _retry_after(resp.status_code, resp.headers)
+                if (
+                    self.rate_limiter is not None
+                    and retry_after is not None
+                    and throttled_retries < self.rate_limiter.max_throttled_retries
+                ):
+                    resp.close()
+                    logger.info("Throttled by %s, retrying after %s seconds", url, retry_after)
+                    self.rate_limiter.hold(url, retry_after)
+                    throttled_retries += 1
+                    continue
+                delay = None
+                if resp.status_code in self.retry_policy.retry_statuses:
+                    delay = self.retry_policy.delay(retries, retry_after)
+                if delay is None:
+                    return resp
+                resp.close()
+                logger.info("Request to %s failed with %s, retrying in %.1f seconds", url, resp.status_code, delay)
+            retries += 1
+            time.sleep(delay)
+
+    async def _send_async(self, url: str, headers: Dict[str, str]) -> aiohttp.ClientResponse:
+        retries = throttled_retries = 0
+        while True:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async(url)
+            try:
+                resp = await self._send_hedged_async(url, headers)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as error:
+                delay = self.retry_policy.delay(retries)
+                if delay is None:
+                    raise
+                logger.info("Request to %s failed with %r, retrying in %.1f seconds", url, error, delay)
+            else:
+                retry_after = _retry_after(resp.status, resp.headers)
+                if (
+                    self.rate_limiter is not None
+                    and retry_after is not None
+                    and throttled_retries < self.rate_limiter.max_throttled_retries
+                ):
+                    resp.release()
+                    logger.info("Throttled by %s, retrying after %s seconds", url, retry_after)
+                    self.rate_limiter.hold(url, retry_after)
+                    throttled_retries += 1
+                    continue
+                delay = None
+                if resp.status in self.retry_policy.retry_statuses:
+                    delay = self.retry_policy.delay(retries, retry_after)
+                if delay is None:
+                    return resp
+                resp.release()
+                logger.info("Request to %s failed with %s, retrying in %.1f seconds", url, resp.status, delay)
+            retries += 1
+            await asyncio.sleep(delay)
+
+    def _send_hedged(self, url: str, headers: Dict[str, str], stream: bool = False) -> requests.Response:
+        """
+        Sends the request, and if it is slower than the hedge percentile, a second copy of it. Whichever copy answers
+        first is used, and the other is closed once it finishes.
+        """
+        hedge_delay = self._hedge_delay(url)
+        if hedge_delay is None:
+            return self._timed_get(url, headers, stream)
+        futures = {self._submit_hedged(self._timed_get, url, headers, stream)}
+        done, _ = concurrent.futures.wait(futures, timeout=hedge_delay)
+        if not done:
+            logger.debug("Hedging request to %s after %.2f seconds", url, hedge_delay)
+            futures.add(self._submit_hedged(self._hedged_get, url, headers, stream))
+        error: Optional[BaseException] = None
+        while futures:
+            done, futures = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_COMPLETED)
+            responses = []
+            for future in done:
+                if future.exception() is None:
+                    responses.append(future.result())
+                else:
+                    error = future.exception()
+            if responses:
+                for resp in responses[1:]:
+                    resp.close()
+                for future in futures:
+                    future.add_done_callback(_close_hedged_response)
+                return responses[0]
+        raise error
+
+    async def _send_hedged_async(self, url: str, headers: Dict[str, str]) -> aiohttp.ClientResponse:
+        hedge_delay = self._hedge_delay(url)
+        if hedge_delay is None:
+            return await self._timed_get_async(url, headers)
+        tasks = {asyncio.ensure_future(self._timed_get_async(url, headers))}
+        done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+        if not done:
+            logger.debug("Hedging request to %s after %.2f seconds", url, hedge_delay)
+            tasks.add(asyncio.ensure_future(self._hedged_get_async(url, headers)))
+        error: Optional[BaseException] = None
+        try:
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                responses = []
+                for task in done:
+                    if task.exception() is None:
+                        responses.append(task.result())
+                    else:
+                        error = task.exception()
+                if responses:
+                    for resp in responses[1:]:
+                        resp.release()
+                    return responses[0]
+            raise error
+        finally:
+            for task in tasks:
+                # A loser can finish before it sees the cancellation, so release its response once it's done
+                task.add_done_callback(_release_hedged_response)
+                task.cancel()
+
+    def _submit_hedged(self, fn: Callable[..., requests.Response], *args: Any) -> concurrent.futures.Future:
+        # Like the session, the executor is created when first needed, and again if the client is used after close.
+        # Submitting under the lock stops close shutting it in between
+        with self._session_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = concurrent.futures.ThreadPoolExecutor(max_workers=2 * self.pool_maxsize)
+            return self._hedge_executor.submit(fn, *args)
+
+    def _timed_get(self, url: str, headers: Dict[str, str], stream: bool = False) -> requests.Response:
+        start = time.monotonic()
+        resp = self.session.get(url, headers=headers, stream=stream, timeout=self.timeout)
+        if resp.status_code < 500:
+            self._record_latency(url, time.monotonic() - start)
+        return resp
+
+    def _hedged_get(self, url: str, headers: Dict[str, str], stream: bool = False) -> requests.Response:
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(url)
+        return self._timed_get(url, headers, stream)
+
+    async def _timed_get_async(self, url: str, headers: Dict[str, str]) -> aiohttp.ClientResponse:
+        start = time.monotonic()
+        resp = await self.async_session.get(
+            url,
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(sock_connect=self.timeout, sock_read=self.timeout),
+        )
+        if resp.status < 500:
+            self._record_latency(url, time.monotonic() - start)
+        return resp
+
+    async def _hedged_get_async(self, url: str, headers: Dict[str, str]) -> aiohttp.ClientResponse:
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire_async(url)
+        return await self._timed_get_async(url, headers)
+
+    def _record_latency(self, url: str, seconds: float) -> None:
+        if self.hedge_percentile is None:
+            return
+        host = urlsplit(url).netloc
+        with self._latencies_lock:
+            latencies = self._latencies.get(host)
+            if latencies is None:
+                latencies = self._latencies[host] = collections.deque(maxlen=self.latency_samples)
+            latencies.append(seconds)
+
+    def _hedge_delay(self, url: str) -> Optional[float]:
+        """
+        How long to wait before hedging a request to the url's host, or None if it should not be hedged
+        """
+        if self.hedge_percentile is None:
+            return None
+        with self._latencies_lock:
+            latencies = sorted(self._latencies.get(urlsplit(url).netloc, ()))
+        # Until there are enough requests to go on, any percentile would be mostly noise
+        if len(latencies) < self.min_hedge_samples:
+            return None
+        return latencies[max(0, math.ceil(self.hedge_percentile / 100 * len(latencies)) - 1)]
+
+    def close(self) -> None:
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+            hedge_executor, self._hedge_executor = self._hedge_executor, None
+        if hedge_executor is not None:
+            hedge_executor.shutdown(wait=False)
+
+    async def close_async(self) -> None:
+        if self._async_session is not None:
+            await self._async_session.close()
+            self._async_session = None
+
+
+def _close_hedged_response(future: concurrent.futures.Future) -> None:
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+def _release_hedged_response(task: asyncio.Future) -> None:
+    if not task.cancelled() and task.exception() is None:
+        task.result().release()
+
+
+def _iter_response_chunks(resp: requests.Response) -> Iterator[bytes]:
+    with resp:
+        yield from resp.iter_content(HttpResponse.chunk_size)
+
+
+async def _aiter_response_chunks(resp: aiohttp.ClientResponse) -> AsyncIterator[bytes]:
+    try:
+        async for chunk in resp.content.iter_chunked(HttpResponse.chunk_size):
+            yield chunk
+    finally:
+        resp.release()
+
+
+def _retry_after(status: int, headers: Mapping[str, str]) -> Optional[float]:
+    """
+    How many seconds a throttled response asks to wait before trying again, or None if it is not throttled
+    """
+    value = headers.get("Retry-After")
+    if status not in (429, 503) or value is None:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    # Otherwise it is an HTTP date
+    try:
+        retry_time = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_time.tzinfo is None:
+        retry_time = retry_time.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, (retry_time - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+
+def _charset(content_type: Optional[str]) -> Optional[str]:
+    for param in (content_type or "").split(";")[1:]:
+        key, _, value = param.strip().partition("=")
+        if key.lower() == "charset":
+            return value.strip("\"' ")
+    return None
+
+
+# Shared by every source which isn't given its own, so all of them stay within the same per host rate limits
+default_http_client = HttpClient(rate_limiter=RateLimiter())
+
+
+class EventType(Enum):
+    NATIONAL_DAY = 10 # National day of whatever
+    HOLIDAY = 20 # "holiday"
+    ON_THIS_DAY = 30 # "on_this_day"
+    BIRTH = 40 # "birth"
+    DEATH = 41 # "death"
 
 
 class Source(ABC):
+    # How many parsed responses to keep, to skip parsing responses which the server says have not changed
+    parsed_response_memo_size = 32
+
+    def __init__(self, http: Optional[HttpClient] = None) -> None:
+        self.http = http or default_http_client
+        self._parsed_responses: collections.OrderedDict = collections.OrderedDict()
+        self._parsed_responses_lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        """
+        Identifies the source in logs and stored events
+        """
+        return type(self).__name__
+
     @property
     def weight(self) -> int:
         """
@@ -42,102 +836,743 @@ class Source(ABC):
         """
         return 10
 
+    @property
+    def cache_ttl(self) -> datetime.timedelta:
+        """
+        How long parsed events from this source can be cached for
+        """
+        return datetime.timedelta(hours=1)
+
+    @abstractmethod
+    def fetch_events(
+        self,
+        day: int,
+        month: int,
+        year: Optional[int] = None,
+        types: Optional[Collection[EventType]] = None,
+    ) -> List[Event]:
+        """
+        Fetches the events on the given day, sorted by event_order_key. If types are given, only events of those types
+        need to be returned, and the source may be able to fetch less.
+        """
+        raise NotImplementedError
+
     @abstractmethod
-    def fetch_events(self, day: int, month: int, year: Optional[int] = None) -> List[Event]:
+    async def fetch_events_async(
+        self,
+        day: int,
+        month: int,
+        year: Optional[int] = None,
+        types: Optional[Collection[EventType]] = None,
+    ) -> List[Event]:
+        """
+        Non-blocking version of fetch_events
+        """
         raise NotImplementedError
 
+    def group_dates(self, dates: Collection[datetime.date]) -> List[List[datetime.date]]:
+        """
+        Splits dates into groups which fetch_events_for_dates can fetch together. By default each date is on its own
+        """
+        return [[date] for date in dates]
+
+    def fetch_events_for_dates(
+        self,
+        dates: Collection[datetime.date],
+        types: Optional[Collection[EventType]] = None,
+    ) -> Dict[datetime.date, List[Event]]:
+        """
+        Fetches the events on each of the given dates, each sorted by event_order_key. Sources which list many days on
+        one page override this, and group_dates, to share fetches between the dates.
+        """
+        return {date: self.fetch_events(date.day, date.month, date.year, types) for date in dates}
+
+    async def fetch_events_for_dates_async(
+        self,
+        dates: Collection[datetime.date],
+        types: Optional[Collection[EventType]] = None,
+    ) -> Dict[datetime.date, List[Event]]:
+        """
+        Non-blocking version of fetch_events_for_dates
+        """
+        dates = list(dates)
+        results = await asyncio.gather(
+            *(self.fetch_events_async(date.day, date.month, date.year, types) for date in dates)
+        )
+        return dict(zip(dates, results))
+
+    def close(self) -> None:
+        """
+        Releases anything the source holds open, other than its HTTP client. The source can still be used afterwards,
+        and reopens whatever it needs, so closing a source shared between collectors is safe.
+        """
+
+    @staticmethod
+    def _resolve_date(day: int, month: int, year: Optional[int] = None) -> datetime.date:
+        """
+        Returns the date for the given day and month, picking the next occurrence of it if no year is given
+        """
+        if year is not None:
+            return datetime.date(year, month, day)
+        today = datetime.date.today()
+        candidate_year = today.year
+        while True:
+            # 29th February only exists in leap years. Any other invalid date raises ValueError here
+            if (month, day) != (2, 29) or calendar.isleap(candidate_year):
+                date = datetime.date(candidate_year, month, day)
+                if date >= today:
+                    return date
+            candidate_year += 1
+
+    @staticmethod
+    def _filter_types(events: List[Event], types: Optional[Collection[EventType]] = None) -> List[Event]:
+        if types is None:
+            return events
+        return [event for event in events if event.type in types]
+
+    def _parse_response(
+        self,
+        response: HttpResponse,
+        key: Tuple,
+        parse: Callable[[HttpResponse], List[Event]],
+    ) -> List[Event]:
+        """
+        Parses the response with the given function, unless the same version of the response has already been parsed
+        for this key. When a conditional request gets a 304, this skips reading and parsing the cached body entirely.
+        """
+        events = self._memoised_events(key, response.validator)
+        if events is not None:
+            response.close()
+            return events
+        events = sorted(parse(response), key=event_order_key)
+        self._memoise_events(key, response.validator, events)
+        return list(events)
+
+    async def _parse_response_async(
+        self,
+        response: HttpResponse,
+        key: Tuple,
+        parse: Callable[[HttpResponse], Awaitable[List[Event]]],
+    ) -> List[Event]:
+        events = self._memoised_events(key, response.validator)
+        if events is not None:
+            await response.aclose()
+            return events
+        events = sorted(await parse(response), key=event_order_key)
+        self._memoise_events(key, response.validator, events)
+        return list(events)
+
+    def _memoised_events(self, key: Tuple, validator: Optional[Tuple]) -> Optional[List[Event]]:
+        if validator is None:
+            return None
+        with self._parsed_responses_lock:
+            memo = self._parsed_responses.get(key)
+            if memo is None or memo[0] != validator:
+                return None
+            self._parsed_responses.move_to_end(key)
+            return list(memo[1])
+
+    def _memoise_events(self, key: Tuple, validator: Optional[Tuple], events: List[Event]) -> None:
+        if validator is None:
+            return
+        with self._parsed_responses_lock:
+            self._parsed_responses[key] = (validator, events)
+            self._parsed_responses.move_to_end(key)
+            while len(self._parsed_responses) > self.parsed_response_memo_size:
+                self._parsed_responses.popitem(last=False)
+
+
+class DayCard(NamedTuple):
+    """
+    The raw text pulled out of one of daysoftheyear's day cards
+    """
+    date_text: str
+    title: str
+    link: str
+
+
+def _is_day_card_class(classes: Optional[Union[str, List[str]]]) -> bool:
+    # While parsing, the strainer may see the class attribute before it has been split into a list
+    if classes is None:
+        return False
+    if isinstance(classes, str):
+        classes = classes.split()
+    return "card--day" in classes
+
+
+# Only builds a tree for the day cards, skipping the navigation, adverts and scripts around them
+day_card_strainer = SoupStrainer("div", attrs={"class": _is_day_card_class})
+
+
+def _extract_day_cards_bs4(html: str, features: str) -> List[DayCard]:
+    soup = BeautifulSoup(html, features, parse_only=day_card_strainer)
+    day_cards = []
+    for day_card in soup.find_all("div", attrs={"class": "card--day"}):
+        card_date = day_card.find("div", attrs={"class": "card__date"}).find("div", attrs={"class": "date_day"})
+        card_title_tag = day_card.find("div", attrs={"class": "card__title"}).find("a")
+        day_cards.append(DayCard(
+            card_date.get_text(" ", strip=True),
+            card_title_tag.get_text(" ", strip=True),
+            card_title_tag["href"],
+        ))
+    return day_cards
+
+
+def _extract_day_cards_selectolax(html: str) -> List[DayCard]:
+    tree = SelectolaxParser(html)
+    day_cards = []
+    for day_card in tree.css("div.card--day"):
+        card_date = day_card.css_first("div.card__date div.date_day")
+        card_title_tag = day_card.css_first("div.card__title a")
+        day_cards.append(DayCard(
+            card_date.text(separator=" ", strip=True),
+            card_title_tag.text(separator=" ", strip=True),
+            card_title_tag.attributes["href"],
+        ))
+    return day_cards
+
+
+_month_numbers = {name.lower(): number for number, name in enumerate(calendar.month_name) if name}
+_month_numbers.update({name.lower(): number for number, name in enumerate(calendar.month_abbr) if name})
+_month_numbers["sept"] = 9
+# Tue Sep 20th, 2022
+_card_day_pattern = re.compile(r"(?:[A-Za-z]+,?\s+)?([A-Za-z]+)\.?\s+(\d{1,2})(?:st|nd|rd|th)?,?\s+(\d{4})")
+# September, 2022
+_card_month_pattern = re.compile(r"([A-Za-z]+),?\s+(\d{4})")
+
+
+def _parse_card_day(text: str) -> datetime.date:
+    match = _card_day_pattern.fullmatch(text)
+    if match is not None and match[1].lower() in _month_numbers:
+        try:
+            return datetime.date(int(match[3]), _month_numbers[match[1].lower()], int(match[2]))
+        except ValueError:
+            pass
+    # Not in a known format, so leave it to dateutil to work out
+    return dateutil.parser.parse(text).date()
+
+
+@lru_cache(maxsize=4096)
+def _parse_card_date(date_text: str) -> Tuple[datetime.date, Optional[datetime.date]]:
+    """
+    Parses the date shown on a daysoftheyear day card into the start and end dates of the day, week or month.
+    The same few strings turn up on many cards and pages, so results are memoised.
+    """
+    date_text = date_text.strip()
+    if " - " in date_text:
+        # Thu Sep 15th, 2022 - Sat Oct 15th, 2022
+        start, end = date_text.split(" - ", 1)
+        return _parse_card_day(start.strip()), _parse_card_day(end.strip())
+    match = _card_month_pattern.fullmatch(date_text)
+    if match is not None and match[1].lower() in _month_numbers:
+        year, month = int(match[2]), _month_numbers[match[1].lower()]
+        return datetime.date(year, month, 1), datetime.date(year, month, calendar.monthrange(year, month)[1])
+    return _parse_card_day(date_text), None
+
+
+# Available backends for extracting day cards from daysoftheyear pages, fastest first
+day_card_extractors: Dict[str, Callable[[str], List[DayCard]]] = {}
+if SelectolaxParser is not None:
+    day_card_extractors["selectolax"] = _extract_day_cards_selectolax
+if lxml is not None:
+    day_card_extractors["lxml"] = partial(_extract_day_cards_bs4, features="lxml")
+day_card_extractors["html.parser"] = partial(_extract_day_cards_bs4, features="html.parser")
+
+
+class JsonArrayStreamDecoder:
+    """
+    Incrementally decodes a JSON object whose values are arrays, returning each array element as soon as all of it
+    has been fed in, rather than waiting for the whole document. Values which are not arrays are skipped.
+    """
+    _whitespace = re.compile(r"\s*")
+    _number_tail = re.compile(r"[0-9eE+\-.]*")
+
+    def __init__(self) -> None:
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json_decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._state = "start"
+        self._key: Optional[str] = None
+
+    def feed(self, chunk: bytes, final: bool = False) -> List[Tuple[str, Any]]:
+        """
+        Adds a chunk of the document, returning (key, element) pairs for the array elements it completed
+        """
+        self._buffer = self._buffer[self._pos:] + self._text_decoder.decode(chunk, final)
+        self._pos = 0
+        elements: List[Tuple[str, Any]] = []
+        while self._step(elements, final):
+            pass
+        return elements
+
+    def close(self) -> List[Tuple[str, Any]]:
+        elements = self.feed(b"", final=True)
+        if self._state != "end":
+            raise ValueError("JSON document ended early")
+        return elements
+
+    def _step(self, elements: List[Tuple[str, Any]], final: bool) -> bool:
+        """
+        Consumes the next token in the buffer, returning False once more data is needed
+        """
+        self._pos = self._whitespace.match(self._buffer, self._pos).end()
+        if self._pos >= len(self._buffer):
+            return False
+        char = self._buffer[self._pos]
+        if self._state == "start":
+            self._expect(char, "{")
+            self._state = "key"
+        elif self._state == "key":
+            if char in ",}":
+                self._pos += 1
+                if char == "}":
+                    self._state = "end"
+                return True
+            decoded, self._key = self._decode_value(final)
+            if not decoded:
+                return False
+            self._state = "colon"
+        elif self._state == "colon":
+            self._expect(char, ":")
+            self._state = "value"
+        elif self._state == "value":
+            if char == "[":
+                self._pos += 1
+                self._state = "elements"
+                return True
+            decoded, _ = self._decode_value(final)
+            if not decoded:
+                return False
+            self._state = "key"
+        elif self._state == "elements":
+            if char in ",]":
+                self._pos += 1
+                if char == "]":
+                    self._state = "key"
+                return True
+            decoded, element = self._decode_value(final)
+            if not decoded:
+                return False
+            elements.append((self._key, element))
+        else:
+            raise ValueError(f"Unexpected data after end of JSON document at position {self._pos}")
+        return True
+
+    def _expect(self, char: str, expected: str) -> None:
+        if char != expected:
+            raise ValueError(f"Expected {expected!r} in JSON document, found {char!r}")
+        self._pos += 1
+
+    def _decode_value(self, final: bool) -> Tuple[bool, Any]:
+        try:
+            value, end = self._json_decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            return False, None
+        if not final and self._number_tail.fullmatch(self._buffer, end):
+            # A number at the end of the buffer may carry on in the next chunk
+            return False, None
+        self._pos = end
+        return True, value
+
 
 class DaysOfTheYearSource(Source):
     url_format = "https://www.daysoftheyear.com/days/{year:04}/{month:02}/{day:02}/"
+    # Lists every day, week and month in the month, so one fetch covers any number of dates in it
+    month_url_format = "https://www.daysoftheyear.com/days/{year:04}/{month:02}/"
+
+    def __init__(self, http: Optional[HttpClient] = None, parser_backend: Optional[str] = None) -> None:
+        """
+        :param parser_backend: Which of day_card_extractors to parse pages with. Defaults to the fastest installed one
+        """
+        super().__init__(http)
+        self.parser_backend = parser_backend or next(iter(day_card_extractors))
+        self._extract_day_cards = day_card_extractors[self.parser_backend]
+
+    @property
+    def cache_ttl(self) -> datetime.timedelta:
+        # Days get added and moved around through the year
+        return datetime.timedelta(hours=6)
+
+    def fetch_events(
+        self,
+        day: int,
+        month: int,
+        year: Optional[int] = None,
+        types: Optional[Collection[EventType]] = None,
+    ) -> List[Event]:
+        if types is not None and EventType.NATIONAL_DAY not in types:
+            return []
+        url = self._page_url(day, month, year)
+        return self._filter_types(self._parse_response(self.http.get(url), (url,), self._parse_page), types)
+
+    async def fetch_events_async(
+        self,
+        day: int,
+        month: int,
+        year: Optional[int] = None,
+        types: Optional[Collection[EventType]] = None,
+    ) -> List[Event]:
+        if types is not None and EventType.NATIONAL_DAY not in types:
+            return []
+        url = self._page_url(day, month, year)
+        return self._filter_types(
+            self._parse_response(await self.http.get_async(url), (url,), self._parse_page),
+            types,
+        )
+
+    def group_dates(self, dates: Collection[datetime.date]) -> List[List[datetime.date]]:
+        months: Dict[Tuple[int, int], List[datetime.date]] = {}
+        for date in dates:
+            months.setdefault((date.year, date.month), []).append(date)
+        return list(months.values())
+
+    def fetch_events_for_dates(
+        self,
+        dates: Collection[datetime.date],
+        types: Optional[Collection[EventType]] = None,
+    ) -> Dict[datetime.date, List[Event]]:
+        events_by_date = {}
+        for month_dates in self.group_dates(dates):
+            events_by_date.update(self._fetch_month(month_dates, types))
+        return events_by_date
+
+    async def fetch_events_for_dates_async(
+        self,
+        dates: Collection[datetime.date],
+        types: Optional[Collection[EventType]] = None,
+    ) -> Dict[datetime.date, List[Event]]:
+        events_by_date = {}
+        for month_events in await asyncio.gather(
+            *(self._fetch_month_async(month_dates, types) for month_dates in self.group_dates(dates))
+        ):
+            events_by_date.update(month_events)
+        return events_by_date
+
+    def _fetch_month(
+        self,
+        dates: List[datetime.date],
+        types: Optional[Collection[EventType]] = None,
+    ) -> Dict[datetime.date, List[Event]]:
+        """
+        Fetches dates which are all in the same month, from the month's page unless there is only one of them
+        """
+        if len(dates) == 1 or (types is not None and EventType.NATIONAL_DAY not in types):
+            return {date: self.fetch_events(date.day, date.month, date.year, types) for date in dates}
+        url = self.month_url_format.format(year=dates[0].year, month=dates[0].month)
+        return self._split_month(dates, self._parse_response(self.http.get(url), (url,), self._parse_page), types)
+
+    async def _fetch_month_async(
+        self,
+        dates: List[datetime.date],
+        types: Optional[Collection[EventType]] = None,
+    ) -> Dict[datetime.date, List[Event]]:
+        if len(dates) == 1 or (types is not None and EventType.NATIONAL_DAY not in types):
+            results = await asyncio.gather(
+                *(self.fetch_events_async(date.day, date.month, date.year, types) for date in dates)
+            )
+            return dict(zip(dates, results))
+        url = self.month_url_format.format(year=dates[0].year, month=dates[0].month)
+        return self._split_month(
+            dates,
+            self._parse_response(await self.http.get_async(url), (url,), self._parse_page),
+            types,
+        )
+
+    def _split_month(
+        self,
+        dates: List[datetime.date],
+        events: List[Event],
+        types: Optional[Collection[EventType]] = None,
+    ) -> Dict[datetime.date, List[Event]]:
+        """
+        Picks out the events from a month's page which fall on each date, counting weeks and months on every day of
+        them as the day pages do
+        """
+        events = self._filter_types(events, types)
+        return {date: [event for event in events if event.date <= date <= event.end_date] for date in dates}
 
-    def fetch_events(self, day: int, month: int, year: Optional[int] = None) -> List[Event]:
-        date = datetime.date(year or datetime.date.today().year, month, day)
-        if year is None and date < today:
-            date += datetime.timedelta(years=1)
-        url = self.url_format.format(year=date.year, month=date.month, day=date.day)
-        resp = requests.get(url)
-        soup = BeautifulSoup(resp.text, "html.parser")
-        day_cards = soup.find_all("div", attrs={"class": "card--day"})
+    def _page_url(self, day: int, month: int, year: Optional[int] = None) -> str:
+        date = self._resolve_date(day, month, year)
+        return self.url_format.format(year=date.year, month=date.month, day=date.day)
+
+    def _parse_page(self, response: HttpResponse) -> List[Event]:
         events = []
-        for day_card in day_cards:
-            card_date = day_card.find("div", attrs={"class": "card__date"}).find("div", attrs={"class": "date_day"})
-            end_date = None
-            if "-" in card_date.content:
-                # <div class="date_day">Thu Sep 15th, 2022 - Sat Oct 15th, 2022</div>
-                start, end = card_date.content.split("-")
-                event_date = dateutil.parser.parse(start.strip()).date
-                end_date = dateutil.parser.parse(end.strip()).date
-            elif card_date.content.split() == 2:
-                # <div class="date_day date_day_month">September, 2022</div>
-                month, year = card_date.content.split(", ")
-                month = datetime.datetime.strptime(month, "%b")
-                event_date = datetime.datetime(year, month.month, 1)
-                end_date = datetime.datetime(year, (month.month % 12) + 1, 1) - datetime.timedelta(days=1)
-            else:
-                # <div class="date_day">Tue Sep 20th, 2022</div>
-                event_date = dateutil.parser.parse(card_date.content)
-            card_title_tag = day_card.find("div", attrs={"class": "card__title"}).find("a")
-            event_title = card_title_tag.content
-            event_link = card_title_tag['href']
-            event = Event(self, event_date, event_title, event_link, EventType.NATIONAL_DAY_OF_X, end_date)
+        for day_card in self._extract_day_cards(response.text):
+            event_date, end_date = _parse_card_date(day_card.date_text)
+            event = Event(self, event_date, day_card.title, day_card.link, EventType.NATIONAL_DAY, end_date)
             events.append(event)
         return events
 
 
 class WikipediaSource(Source):
-    api_format = "https://en.wikipedia.org/api/rest_v1/feed/onthisday/all/{month:02}/{day:02}"
-
-    def fetch_events(self, day: int, month: int, year: Optional[int] = None) -> List[Event]:
-        date = datetime.date(year or datetime.date.today().year, month, day)
-        if year is None and date < today:
-            date += datetime.timedelta(years=1)
-        api_url = self.api_format.format(month=month, day=day)
-        resp = requests.get(api_url)
-        api_data = resp.json()
-        all_events = []
-        for birth_data in api_data['births']:
-            all_events.append(Event(
-                self,
-                datetime.date(birth_data['year'], month, day),
-                birth_data['text'],
-                birth_data['pages'][0]['content_urls']['desktop']['page'],
-                EventType.BIRTH
-            ))
-        for death_data in api_data['deaths']:
-            all_events.append(Event(
-                self,
-                datetime.date(death_data['year'], month, day),
-                death_data['text'],
-                birth_data['pages'][0]['content_urls']['desktop']['page'],
-                EventType.DEATH
-            ))
-        for event_data in api_data['events']:
-            all_events.append(Event(
-                self,
-                datetime.date(event_data['year'], month, day),
-                event_data['text'],
-                event_data['pages'][0]['content_urls']['desktop']['page'],
-                EventType.ON_THIS_DAY
-            ))
-        for holiday_data in api_data['holidays']:
-            all_events.append(Event(
-                self,
-                datetime.date(date.year, month, day),
-                holiday_data['text'],
-                holiday_data['pages'][0]['content_urls']['desktop']['page'],
-                EventType.HOLIDAY
+    api_format = "https://en.wikipedia.org/api/rest_v1/feed/onthisday/{feed}/{month:02}/{day:02}"
+    # Which sections of the feed to read, and the type of event each one lists. Each also has its own feed
+    feed_sections = {
+        "births": EventType.BIRTH,
+        "deaths": EventType.DEATH,
+        "events": EventType.ON_THIS_DAY,
+        "holidays": EventType.HOLIDAY,
+    }
+
+    @property
+    def cache_ttl(self) -> datetime.timedelta:
+        # The feed for each day barely changes
+        return datetime.timedelta(days=7)
+
+    def fetch_events(
+        self,
+        day: int,
+        month: int,
+        year: Optional[int] = None,
+        types: Optional[Collection[EventType]] = None,
+    ) -> List[Event]:
+        date = self._resolve_date(day, month, year)
+        feed_events = []
+        for feed in self._feeds(types):
+            api_url = self.api_format.format(feed=feed, month=month, day=day)
+            feed_events.append(self._parse_response(
+                self.http.get(api_url, stream=True),
+                (api_url, date.year),
+                lambda response: self._parse_feed(response.iter_content(), date),
             ))
+        return self._filter_types(list(heapq.merge(*feed_events, key=event_order_key)), types)
+
+    async def fetch_events_async(
+        self,
+        day: int,
+        month: int,
+        year: Optional[int] = None,
+        types: Optional[Collection[EventType]] = None,
+    ) -> List[Event]:
+        date = self._resolve_date(day, month, year)
+        feed_events = await asyncio.gather(*(self._fetch_feed_async(feed, date) for feed in self._feeds(types)))
+        return self._filter_types(list(heapq.merge(*feed_events, key=event_order_key)), types)
+
+    async def _fetch_feed_async(self, feed: str, date: datetime.date) -> List[Event]:
+        api_url = self.api_format.format(feed=feed, month=date.month, day=date.day)
+        return await self._parse_response_async(
+            await self.http.get_async(api_url, stream=True),
+            (api_url, date.year),
+            lambda response: self._parse_feed_async(response.aiter_content(), date),
+        )
+
+    def _feeds(self, types: Optional[Collection[EventType]] = None) -> List[str]:
+        """
+        Which feeds to fetch for the given event types. The feed of everything is used unless only some of the types
+        are wanted, in which case each type's own, much smaller, feed is fetched instead.
+        """
+        if types is None:
+            return ["all"]
+        feeds = [section for section, event_type in self.feed_sections.items() if event_type in types]
+        if len(feeds) == len(self.feed_sections):
+            return ["all"]
+        return feeds
+
+    def _parse_feed(self, chunks: Iterable[bytes], date: datetime.date) -> List[Event]:
+        """
+        Parses the feed as it streams in, so only one entry of it needs to be held in memory at a time
+        """
+        decoder = JsonArrayStreamDecoder()
+        all_events = []
+        for chunk in chunks:
+            all_events += self._feed_events(decoder.feed(chunk), date)
+        all_events += self._feed_events(decoder.close(), date)
+        return all_events
+
+    async def _parse_feed_async(self, chunks: AsyncIterator[bytes], date: datetime.date) -> List[Event]:
+        decoder = JsonArrayStreamDecoder()
+        all_events = []
+        async for chunk in chunks:
+            all_events += self._feed_events(decoder.feed(chunk), date)
+        all_events += self._feed_events(decoder.close(), date)
         return all_events
 
+    def _feed_events(self, entries: List[Tuple[str, Dict]], date: datetime.date) -> Iterator[Event]:
+        for section, entry_data in entries:
+            event_type = self.feed_sections.get(section)
+            if event_type is None:
+                continue
+            # Holidays recur every year, everything else happened in a specific year
+            event_year = date.year if event_type == EventType.HOLIDAY else entry_data["year"]
+            # BC years are negative, and datetime cannot represent them
+            if event_year < 1:
+                continue
+            try:
+                event_date = datetime.date(event_year, date.month, date.day)
+            except ValueError:
+                # 29th February outside a leap year
+                continue
+            pages = entry_data.get("pages")
+            yield Event(
+                self,
+                event_date,
+                entry_data["text"],
+                pages[0]["content_urls"]["desktop"]["page"] if pages else "",
+                event_type,
+            )
+
+
+class OnThisDayEntry(NamedTuple):
+    """
+    The raw text pulled out of one of the entries listed on an onthisday.com page
+    """
+    heading: str
+    year_text: str
+    text: str
+    link: str
+
+
+# Entries are list items, and on the highlights page the headings above them say which kind of entry they are
+on_this_day_strainer = SoupStrainer(["h2", "h3", "li"])
+# 1876, but not 44 BC, which datetime cannot represent
+_entry_year_pattern = re.compile(r"(\d{1,4})(\s*BC)?")
+
+
+def _extract_on_this_day_entries(html: str, base_url: str, features: str) -> List[OnThisDayEntry]:
+    soup = BeautifulSoup(html, features, parse_only=on_this_day_strainer)
+    entries = []
+    heading = ""
+    for tag in soup.find_all(["h2", "h3", "li"]):
+        if tag.name != "li":
+            heading = tag.get_text(" ", strip=True)
+            continue
+        classes = tag.get("class") or []
+        if "event" not in classes and "person" not in classes:
+            continue
+        date_tag = tag.find(attrs={"class": "date"})
+        if date_tag is None:
+            continue
+        year_text = date_tag.get_text(" ", strip=True)
+        date_tag.extract()
+        link_tag = tag.find("a", href=True)
+        entries.append(OnThisDayEntry(
+            heading,
+            year_text,
+            " ".join(tag.get_text().split()),
+            urljoin(base_url, link_tag["href"]) if link_tag is not None else "",
+        ))
+    return entries
+
+
 class OnThisDayComSource(Source):
-    # Highlights: https://www.onthisday.com/day/march/10
-    # Events: https://www.onthisday.com/events/march/10
-    # Births: https://www.onthisday.com/birthdays/march/10
-    # Deaths: https://www.onthisday.com/deaths/march/10
-    
+    base_url = "https://www.onthisday.com"
+    # Every page for a date, and the type of event it lists. The highlights page mixes all three, under headings
+    pages = {
+        "day": None,
+        "events": EventType.ON_THIS_DAY,
+        "birthdays": EventType.BIRTH,
+        "deaths": EventType.DEATH,
+    }
+
+    def __init__(self, http: Optional[HttpClient] = None) -> None:
+        super().__init__(http)
+        self.features = "lxml" if lxml is not None else "html.parser"
+        # Fetches a date's pages in parallel, over the HTTP client's pooled connections to the site. Created when first
+        # needed, and again after close
+        self._page_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._page_executor_lock = threading.Lock()
+
+    @property
+    def cache_ttl(self) -> datetime.timedelta:
+        # Pages for past events barely change
+        return datetime.timedelta(days=7)
+
+    def fetch_events(
+        self,
+        day: int,
+        month: int,
+        year: Optional[int] = None,
+        types: Optional[Collection[EventType]] = None,
+    ) -> List[Event]:
+        date = self._resolve_date(day, month, year)
+        with self._page_executor_lock:
+            if self._page_executor is None:
+                self._page_executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(self.pages))
+            # Submitted under the lock, so that close can't shut the executor in between
+            futures = [self._page_executor.submit(self._fetch_page, page, date) for page in self._pages(types)]
+        page_events = [future.result() for future in futures]
+        return self._filter_types(list(merge_sorted_events(page_events)), types)
+
+    async def fetch_events_async(
+        self,
+        day: int,
+        month: int,
+        year: Optional[int] = None,
+        types: Optional[Collection[EventType]] = None,
+    ) -> List[Event]:
+        date = self._resolve_date(day, month, year)
+        page_events = await asyncio.gather(*(self._fetch_page_async(page, date) for page in self._pages(types)))
+        return self._filter_types(list(merge_sorted_events(page_events)), types)
+
+    def close(self) -> None:
+        # Pages already submitted still get fetched
+        with self._page_executor_lock:
+            page_executor, self._page_executor = self._page_executor, None
+        if page_executor is not None:
+            page_executor.shutdown(wait=False)
+
+    def _pages(self, types: Optional[Collection[EventType]] = None) -> List[str]:
+        """
+        Which pages to fetch for the given event types. Everything on the highlights page is also on the page for its
+        type, so it is only worth fetching when all types are wanted.
+        """
+        if types is None:
+            return list(self.pages)
+        return [page for page, event_type in self.pages.items() if event_type in types]
+
+    def _page_url(self, page: str, date: datetime.date) -> str:
+        return f"{self.base_url}/{page}/{calendar.month_name[date.month].lower()}/{date.day}"
+
+    def _fetch_page(self, page: str, date: datetime.date) -> List[Event]:
+        url = self._page_url(page, date)
+        return self._parse_response(
+            self.http.get(url),
+            (url,),
+            lambda response: self._parse_page(response, self.pages[page], date),
+        )
+
+    async def _fetch_page_async(self, page: str, date: datetime.date) -> List[Event]:
+        url = self._page_url(page, date)
+        return self._parse_response(
+            await self.http.get_async(url),
+            (url,),
+            lambda response: self._parse_page(response, self.pages[page], date),
+        )
+
+    def _parse_page(self, response: HttpResponse, page_type: Optional[EventType], date: datetime.date) -> List[Event]:
+        events = []
+        for entry in _extract_on_this_day_entries(response.text, response.url, self.features):
+            event_type = page_type or self._heading_type(entry.heading)
+            match = _entry_year_pattern.search(entry.year_text)
+            if match is None or match[2]:
+                continue
+            try:
+                event_date = datetime.date(int(match[1]), date.month, date.day)
+            except ValueError:
+                # Year 0, or 29th February outside a leap year
+                continue
+            events.append(Event(self, event_date, entry.text, entry.link, event_type))
+        return events
+
+    @staticmethod
+    def _heading_type(heading: str) -> EventType:
+        heading = heading.lower()
+        if "birth" in heading:
+            return EventType.BIRTH
+        if "death" in heading:
+            return EventType.DEATH
+        return EventType.ON_THIS_DAY
+
 
 @total_ordering
 class Event:
+    # Bulk indexes hold a lot of events, so they don't get a __dict__ each. Sources and event types are shared between
+    # events rather than copied, and single day events don't store a separate end date.
+    __slots__ = ("source", "date", "_end_date", "title", "link", "type", "order_index")
+
     def __init__(
         self,
         source: 'Source',
@@ -149,72 +1584,1224 @@ class Event:
     ) -> None:
         self.source = source
         self.date = date
-        self.end_date = end_date or date
+        self._end_date = end_date if end_date != date else None
         self.title = title
         self.link = link
         self.type = type
+        # Worked out once up front, as sorting compares each event many times
+        self.order_index = self._build_order_index()
+
+    @property
+    def end_date(self) -> datetime.date:
+        return self._end_date or self.date
 
     @property
     def is_single_day(self) -> bool:
-        return self.end_date is None or self.date == self.end_date
+        return self._end_date is None
+
+    def to_dict(self) -> Dict:
+        return {
+            "source": self.source.name,
+            "date": self.date.isoformat(),
+            "end_date": None if self.is_single_day else self.end_date.isoformat(),
+            "title": self.title,
+            "link": self.link,
+            "type": self.type.name,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, source: Source) -> Event:
+        return cls(
+            source,
+            datetime.date.fromisoformat(data["date"]),
+            data["title"],
+            data["link"],
+            EventType[data["type"]],
+            datetime.date.fromisoformat(data["end_date"]) if data["end_date"] else None,
+        )
 
     def __eq__(self, other) -> bool:
         if not isinstance(other, Event):
             return False
         return self.title == other.title and self.link == other.link
 
+    def __hash__(self) -> int:
+        return hash((self.title, self.link))
+
     def __str__(self) -> str:
         date_str = self.date.strftime("%Y-%m-%d")
         if not self.is_single_day:
             date_str += " - " + self.end_date.strftime("%Y-%m-%d")
-        return f"{date_str}: {self.type.name}: {self.title} ({self.link})
+        return f"{date_str}: {self.type.name}: {self.title} ({self.link})"
 
     def __lt__(self, other) -> bool:
         if not isinstance(other, Event):
             return NotImplemented
         return self.order_index < other.order_index
 
-    @property
-    def order_index(self) -> List:
+    def _build_order_index(self) -> Tuple:
         """
-        Returns a list to use when ordering events
+        Returns a tuple to use when ordering events
         """
         # TODO: Maybe order births and deaths by notoriety
         # TODO: Maybe mix source and event rating
         # TODO: Rate events by sentiment analysis
-        return [
+        return (
             self.source.weight,  # Source weight first
             0 if self.is_single_day else 1,  # Single days should come before multi-day events
             self.date,  # Order by event date
             self.type.value,  # Order by event type
             self.title,  # Order by title
-        ]
+        )
 
 
-class EventType(Enum):
-    NATIONAL_DAY = 10 # National day of whatever
-    HOLIDAY = 20 # "holiday"
-    ON_THIS_DAY = 30 # "on_this_day"
-    BIRTH = 40 # "birth"
-    DEATH = 41 # "death"
+# Sort key for events, which is much quicker than sorting by comparing the events themselves
+event_order_key = attrgetter("order_index")
+
+
+def merge_sorted_events(event_lists: Iterable[List[Event]]) -> Iterator[Event]:
+    """
+    Lazily merges lists of events which are each already sorted by event_order_key, in O(n log k) for k lists.
+    Events seen earlier in the merge are dropped, and as the best weighted source sorts first, the copy kept of an
+    event listed by several sources is the one from the best weighted source.
+    """
+    seen_events = set()
+    for event in heapq.merge(*event_lists, key=event_order_key):
+        if event not in seen_events:
+            seen_events.add(event)
+            yield event
+
+
+# Each blake2b digest gives 32 independent 16-bit hashes in one go
+_digest_values = struct.Struct("<32H")
+
+
+@lru_cache(maxsize=65536)
+def _trigram_hashes(trigram: str, count: int) -> Tuple[int, ...]:
+    """
+    Hashes a trigram with count different hash functions. The same trigrams turn up in many titles, so are memoised.
+    """
+    hashes: Tuple[int, ...] = ()
+    for block in range(math.ceil(count / 32)):
+        digest = hashlib.blake2b(trigram.encode(), digest_size=64, salt=bytes([block]))
+        hashes += _digest_values.unpack(digest.digest())
+    return hashes[:count]
+
+
+class SimilarEventDeduplicator:
+    """
+    Merges events with nearly the same title on the same date, such as one day listed under slightly different names by
+    different sources, keeping the first of them in sort order.
+    Titles are compared by MinHash signatures of their character trigrams. Locality sensitive hashing means only events
+    which share a band of their signature are compared, rather than every pair of events.
+    """
+    stop_words = frozenset({"a", "an", "and", "day", "international", "national", "of", "the", "world"})
+    _parenthesised = re.compile(r"\([^)]*\)")
+    _non_word = re.compile(r"[^a-z0-9]+")
+
+    def __init__(self, threshold: float = 0.5, bands: int = 8, rows: int = 4) -> None:
+        """
+        :param threshold: How much of two titles' signatures must match for them to count as the same
+        :param bands: How many bands to split signatures into for bucketing. More bands find more candidate pairs
+        :param rows: How many signature values go in each band. More rows make candidates more similar
+        """
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+
+    def deduplicate(self, events: List[Event]) -> List[Event]:
+        # Batches covering several days repeat a lot of titles
+        signatures_by_title = {event.title: None for event in events}
+        for title in signatures_by_title:
+            signatures_by_title[title] = self._signature(title)
+        signatures = [signatures_by_title[event.title] for event in events]
+        parents = list(range(len(events)))
+
+        def find(index: int) -> int:
+            while parents[index] != index:
+                parents[index] = parents[parents[index]]
+                index = parents[index]
+            return index
+
+        buckets: Dict[Tuple, List[int]] = collections.defaultdict(list)
+        for index, (event, signature) in enumerate(zip(events, signatures)):
+            if signature is None:
+                continue
+            for band in range(self.bands):
+                band_values = signature[band * self.rows:(band + 1) * self.rows]
+                buckets[(event.date, band, band_values)].append(index)
+        # Buckets are small, so every pair in them is compared. Comparing only with the first would miss matches
+        # between the others whenever the first matches none of them
+        for bucket in buckets.values():
+            for position, index in enumerate(bucket):
+                for other in bucket[position + 1:]:
+                    root, other_root = find(index), find(other)
+                    if root != other_root and self._similarity(signatures[index], signatures[other]) >= self.threshold:
+                        parents[other_root] = root
+
+        best: Dict[int, Event] = {}
+        for index, event in enumerate(events):
+            root = find(index)
+            if root not in best or event.order_index < best[root].order_index:
+                best[root] = event
+        return [event for index, event in enumerate(events) if best[find(index)] is event]
+
+    def _signature(self, title: str) -> Optional[Tuple[int, ...]]:
+        words = self._non_word.split(self._parenthesised.sub(" ", title.lower()))
+        normalised = " ".join(word for word in words if word and word not in self.stop_words)
+        if not normalised:
+            return None
+        trigrams = {normalised[n:n + 3] for n in range(max(1, len(normalised) - 2))}
+        trigram_hashes = (_trigram_hashes(trigram, self.bands * self.rows) for trigram in trigrams)
+        # The minimum of each hash across all of the trigrams
+        return tuple(map(min, zip(*trigram_hashes)))
+
+    @staticmethod
+    def _similarity(signature: Tuple[int, ...], other_signature: Tuple[int, ...]) -> float:
+        """
+        Estimates the Jaccard similarity of two titles' trigrams
+        """
+        matches = sum(1 for value, other_value in zip(signature, other_signature) if value == other_value)
+        return matches / len(signature)
+
+
+class EventCache:
+    """
+    In-memory cache of parsed events for each source and date. Entries expire after their source's cache_ttl, and the
+    least recently used entries are evicted once the cache grows past max_bytes.
+    """
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_stale: Optional[datetime.timedelta] = None) -> None:
+        """
+        :param max_stale: If given, expired entries are kept this much longer, for collectors to serve while they
+            refresh them in the background
+        """
+        self.max_bytes = max_bytes
+        self.max_stale = max_stale
+        self.size_bytes = 0
+        # Maps (source, month, day, year, types) to (expiry time, size, events)
+        self._entries: collections.OrderedDict = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        source: Source,
+        day: int,
+        month: int,
+        year: Optional[int] = None,
+        types: Optional[Collection[EventType]] = None,
+    ) -> Optional[List[Event]]:
+        cached = self.lookup(source, day, month, year, types)
+        if cached is None or cached[1]:
+            return None
+        return cached[0]
+
+    def lookup(
+        self,
+        source: Source,
+        day: int,
+        month: int,
+        year: Optional[int] = None,
+        types: Optional[Collection[EventType]] = None,
+    ) -> Optional[Tuple[List[Event], bool]]:
+        """
+        Returns the cached events along with whether they have expired, which they can be by up to max_stale
+        """
+        key = self._key(source, day, month, year, types)
+        max_stale_seconds = self.max_stale.total_seconds() if self.max_stale is not None else 0
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expiry, size, events = entry
+            now = time.monotonic()
+            if now >= expiry + max_stale_seconds:
+                del self._entries[key]
+                self.size_bytes -= size
+                return None
+            self._entries.move_to_end(key)
+            return list(events), now >= expiry
+
+    def put(
+        self,
+        source: Source,
+        day: int,
+        month: int,
+        year: Optional[int],
+        types: Optional[Collection[EventType]],
+        events: List[Event],
+        ttl: Optional[datetime.timedelta] = None,
+    ) -> None:
+        """
+        :param ttl: How long to keep the events for, instead of the source's cache_ttl
+        """
+        key = self._key(source, day, month, year, types)
+        expiry = time.monotonic() + (ttl or source.cache_ttl).total_seconds()
+        size = _approximate_size(events)
+        with self._lock:
+            old_entry = self._entries.pop(key, None)
+            if old_entry is not None:
+                self.size_bytes -= old_entry[1]
+            self._entries[key] = (expiry, size, list(events))
+            self.size_bytes += size
+            while self.size_bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self.size_bytes -= evicted_size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    @staticmethod
+    def _key(
+        source: Source,
+        day: int,
+        month: int,
+        year: Optional[int],
+        types: Optional[Collection[EventType]],
+    ) -> Tuple:
+        return source, month, day, year, None if types is None else frozenset(types)
+
+
+def _approximate_size(events: List[Event]) -> int:
+    """
+    Roughly how many bytes of memory a list of events takes up, not counting the shared sources and event types
+    """
+    size = sys.getsizeof(events)
+    for event in events:
+        size += sys.getsizeof(event) + sys.getsizeof(event.title) + sys.getsizeof(event.link)
+        size += sys.getsizeof(event.date) + (0 if event.is_single_day else sys.getsizeof(event.end_date))
+    return size
+
+
+def _select_events(
+    sorted_events: Iterator[Event],
+    limit: Optional[int] = None,
+    similar_event_deduplicator: Optional[SimilarEventDeduplicator] = None,
+) -> List[Event]:
+    """
+    Takes the top events from a sorted stream of them, only reading as far into it as is needed for the limit
+    """
+    if similar_event_deduplicator is None:
+        return list(itertools.islice(sorted_events, limit))
+    if limit is None:
+        return similar_event_deduplicator.deduplicate(list(sorted_events))
+    # Merging near duplicates can leave fewer than the limit, so keep taking more until there are enough left
+    candidates: List[Event] = []
+    batch_size = limit
+    while True:
+        batch = list(itertools.islice(sorted_events, batch_size))
+        candidates += batch
+        selected = similar_event_deduplicator.deduplicate(candidates)
+        if len(selected) >= limit or len(batch) < batch_size:
+            return selected[:limit]
+        batch_size = len(candidates)
+
+
+def _date_range(start: datetime.date, end: datetime.date) -> List[datetime.date]:
+    return [start + datetime.timedelta(days=n) for n in range((end - start).days + 1)]
+
+
+def _prewarm_ttl(source: Source, date: datetime.date) -> datetime.timedelta:
+    """
+    How long to cache prewarmed events for: at least until the end of their date, so they are still there when asked for
+    """
+    end_of_date = datetime.datetime.combine(date + datetime.timedelta(days=1), datetime.time.min)
+    return max(source.cache_ttl, end_of_date - datetime.datetime.now())
+
+
+def _plan_date_fetches(
+    sources: List[Source],
+    event_cache: Optional[EventCache],
+    dates: List[datetime.date],
+    types: Optional[Collection[EventType]] = None,
+) -> Tuple[Dict[datetime.date, List[List[Event]]], List[Tuple[Source, List[datetime.date]]]]:
+    """
+    Collects each source's cached events on the dates, and works out which groups of dates each source still needs
+    to fetch
+    """
+    source_events: Dict[datetime.date, List[List[Event]]] = {date: [] for date in dates}
+    fetches = []
+    for source in sources:
+        uncached_dates = []
+        for date in dates:
+            events = None
+            if event_cache is not None:
+                events = event_cache.get(source, date.day, date.month, date.year, types)
+            if events is None:
+                uncached_dates.append(date)
+            else:
+                source_events[date].append(events)
+        fetches += [(source, group) for group in source.group_dates(uncached_dates)]
+    return source_events, fetches
+
+
+class _EventStream:
+    """
+    Works out which events can be passed on as each source's events arrive. When ordered, an event is final once every
+    source which could still have an earlier one has arrived: as the source weight sorts first, that is every source
+    weighted lower than it, or the same. Otherwise events are passed on as soon as their source arrives, and where
+    sources list the same event, the first to arrive wins.
+    """
+    def __init__(self, sources: List[Source], ordered: bool = True) -> None:
+        self.ordered = ordered
+        self._pending_weights = collections.Counter(source.weight for source in sources)
+        self._ready: List[List[Event]] = []
+        self._seen_events = set()
+
+    def add(self, source: Source, events: List[Event]) -> List[Event]:
+        """
+        Takes a source's sorted events, returning the events which have become final, in order
+        """
+        self._pending_weights[source.weight] -= 1
+        if not self.ordered:
+            return self._unseen(events)
+        self._ready.append(events)
+        pending_weights = [weight for weight, count in self._pending_weights.items() if count > 0]
+        min_pending_weight = min(pending_weights, default=None)
+        merged_events = heapq.merge(*self._ready, key=event_order_key)
+        final_events = []
+        self._ready = []
+        for event in merged_events:
+            if min_pending_weight is not None and event.order_index[0] >= min_pending_weight:
+                self._ready = [[event, *merged_events]]
+                break
+            final_events.append(event)
+        return self._unseen(final_events)
+
+    def _unseen(self, events: List[Event]) -> List[Event]:
+        unseen_events = []
+        for event in events:
+            if event not in self._seen_events:
+                self._seen_events.add(event)
+                unseen_events.append(event)
+        return unseen_events
 
 
 class EventCollector:
-    def __init__(self) -> None:
-        self.sources = [DaysOfTheYearSource()]
+    def __init__(
+        self,
+        sources: Optional[List[Source]] = None,
+        event_cache: Optional[EventCache] = None,
+        similar_event_deduplicator: Optional[SimilarEventDeduplicator] = None,
+    ) -> None:
+        """
+        :param event_cache: If given, events are cached there. If it has a max_stale, expired events are returned
+            straight away while they are refreshed in the background
+        :param similar_event_deduplicator: If given, also merges events with nearly the same title, not just duplicates
+        """
+        self.sources = sources or [DaysOfTheYearSource()]
+        self.event_cache = event_cache
+        self.similar_event_deduplicator = similar_event_deduplicator
+        # Cache keys being refreshed in the background, so each is only refreshed once at a time
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+        self._refresh_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
 
-    def events_today(self) -> List[Event]:
+    def events_today(
+        self,
+        types: Optional[Collection[EventType]] = None,
+        limit: Optional[int] = None,
+    ) -> List[Event]:
         t_day = datetime.date.today()
+        return self.events_on(t_day.day, t_day.month, t_day.year, types=types, limit=limit)
+
+    def events_on(
+        self,
+        day: int,
+        month: int,
+        year: Optional[int] = None,
+        types: Optional[Collection[EventType]] = None,
+        limit: Optional[int] = None,
+    ) -> List[Event]:
+        """
+        Returns the deduplicated events on the given day, sorted by event_order_key. If a limit is given, only that
+        many of the top events are returned, and the rest are never merged or deduplicated.
+        """
+        sorted_events = merge_sorted_events(self._fetch_sources(day, month, year, types))
+        return _select_events(sorted_events, limit, self.similar_event_deduplicator)
+
+    def iter_events(
+        self,
+        day: int,
+        month: int,
+        year: Optional[int] = None,
+        types: Optional[Collection[EventType]] = None,
+        ordered: bool = True,
+    ) -> Iterator[Event]:
+        """
+        Yields the deduplicated events on the given day as the sources finish fetching them, so the first can be used
+        before the slowest source is done. If ordered, they come out sorted by event_order_key, otherwise each
+        source's events come out as soon as it is done. Near duplicates are not merged, as that needs every event.
+        """
+        stream = _EventStream(self.sources, ordered)
+        for source, events in self._iter_sources(day, month, year, types):
+            yield from stream.add(source, events)
+
+    def events_for_dates(
+        self,
+        dates: Iterable[datetime.date],
+        types: Optional[Collection[EventType]] = None,
+        limit: Optional[int] = None,
+    ) -> Dict[datetime.date, List[Event]]:
+        """
+        Returns the events on each of the given dates, as events_on would. Each source fetches the dates in groups it
+        can fetch together, such as a whole month's page, so this takes far fewer requests than going day by day.
+        """
+        dates = list(dict.fromkeys(dates))
+        source_events, fetches = _plan_date_fetches(self.sources, self.event_cache, dates, types)
+        for events_by_date in self._fetch_date_groups(fetches, types):
+            for date, events in events_by_date.items():
+                source_events[date].append(events)
+        return {
+            date: _select_events(merge_sorted_events(source_events[date]), limit, self.similar_event_deduplicator)
+            for date in dates
+        }
+
+    def events_for_range(
+        self,
+        start: datetime.date,
+        end: datetime.date,
+        types: Optional[Collection[EventType]] = None,
+        limit: Optional[int] = None,
+    ) -> Dict[datetime.date, List[Event]]:
+        """
+        Returns the events on each date from start to end, inclusive
+        """
+        return self.events_for_dates(_date_range(start, end), types, limit)
+
+    def prewarm(self, dates: Iterable[datetime.date], types: Optional[Collection[EventType]] = None) -> None:
+        """
+        Fetches the events on the given dates into the event cache, even if they are already there, and keeps them
+        until the end of each date, so that the first requests for them don't wait on any source
+        """
+        if self.event_cache is None:
+            raise ValueError("Prewarming needs an event_cache")
+        _, fetches = _plan_date_fetches(self.sources, None, list(dict.fromkeys(dates)), types)
+        self._fetch_date_groups(fetches, types, prewarm=True)
+
+    def fetch_events(
+        self,
+        day: int,
+        month: int,
+        year: Optional[int] = None,
+        types: Optional[Collection[EventType]] = None,
+    ) -> List[Event]:
+        """
+        Returns every source's events on the given day, without sorting or deduplicating them
+        """
         all_events = []
+        for events in self._fetch_sources(day, month, year, types):
+            all_events += events
+        return all_events
+
+    def _fetch_sources(
+        self,
+        day: int,
+        month: int,
+        year: Optional[int] = None,
+        types: Optional[Collection[EventType]] = None,
+    ) -> List[List[Event]]:
+        """
+        Returns each source's sorted events on the given day
+        """
+        return [events for _, events in self._iter_sources(day, month, year, types)]
+
+    def _iter_sources(
+        self,
+        day: int,
+        month: int,
+        year: Optional[int] = None,
+        types: Optional[Collection[EventType]] = None,
+    ) -> Iterator[Tuple[Source, List[Event]]]:
+        """
+        Yields each source with its sorted events on the given day, as soon as they are fetched
+        """
+        # Lower weighted sources sort first, so fetching them first lets ordered streams start sooner
+        for source in sorted(self.sources, key=attrgetter("weight")):
+            yield source, self._fetch_source(source, day, month, year, types)
+
+    def _fetch_date_groups(
+        self,
+        fetches: List[Tuple[Source, List[datetime.date]]],
+        types: Optional[Collection[EventType]] = None,
+        prewarm: bool = False,
+    ) -> List[Dict[datetime.date, List[Event]]]:
+        """
+        Fetches each source's group of dates, returning their sorted events by date
+        """
+        return [self._fetch_source_dates(source, dates, types, prewarm) for source, dates in fetches]
+
+    def _fetch_source(
+        self,
+        source: Source,
+        day: int,
+        month: int,
+        year: Optional[int] = None,
+        types: Optional[Collection[EventType]] = None,
+    ) -> List[Event]:
+        if self.event_cache is not None:
+            cached = self.event_cache.lookup(source, day, month, year, types)
+            if cached is not None:
+                events, stale = cached
+                if stale:
+                    self._refresh_in_background(source, day, month, year, types)
+                return events
+        return self._refresh_source(source, day, month, year, types)
+
+    def _refresh_in_background(
+        self,
+        source: Source,
+        day: int,
+        month: int,
+        year: Optional[int] = None,
+        types: Optional[Collection[EventType]] = None,
+    ) -> None:
+        key = EventCache._key(source, day, month, year, types)
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return
+            # As with HttpClient's hedge executor, this is created when first needed, and again after close.
+            # Submitting under the lock stops close shutting it in between
+            if self._refresh_executor is None:
+                self._refresh_executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(self.sources))
+            future = self._refresh_executor.submit(self._refresh_source, source, day, month, year, types)
+            self._refreshing.add(key)
+        future.add_done_callback(partial(self._refresh_done, key, source))
+
+    def _refresh_done(self, key: Tuple, source: Source, future: concurrent.futures.Future) -> None:
+        with self._refresh_lock:
+            self._refreshing.discard(key)
+        if not future.cancelled() and future.exception() is not None:
+            # The stale events stay in the cache, to be served until they pass max_stale
+            logger.error("Source %s failed to refresh events", source.name, exc_info=future.exception())
+
+    def _refresh_source(
+        self,
+        source: Source,
+        day: int,
+        month: int,
+        year: Optional[int] = None,
+        types: Optional[Collection[EventType]] = None,
+    ) -> List[Event]:
+        # Sources should already have sorted their events, in which case this is a single pass to check it
+        events = sorted(source.fetch_events(day, month, year, types), key=event_order_key)
+        if self.event_cache is not None:
+            self.event_cache.put(source, day, month, year, types, events)
+        return events
+
+    def _fetch_source_dates(
+        self,
+        source: Source,
+        dates: List[datetime.date],
+        types: Optional[Collection[EventType]] = None,
+        prewarm: bool = False,
+    ) -> Dict[datetime.date, List[Event]]:
+        events_by_date = {}
+        for date, events in source.fetch_events_for_dates(dates, types).items():
+            events = events_by_date[date] = sorted(events, key=event_order_key)
+            if self.event_cache is not None:
+                ttl = _prewarm_ttl(source, date) if prewarm else None
+                self.event_cache.put(source, date.day, date.month, date.year, types, events, ttl)
+        return events_by_date
+
+    def close(self) -> None:
+        with self._refresh_lock:
+            refresh_executor, self._refresh_executor = self._refresh_executor, None
+        if refresh_executor is not None:
+            refresh_executor.shutdown(wait=False, cancel_futures=True)
         for source in self.sources:
-            all_events += source.fetch_events(t_day.day, t_day.month)
-        sorted_events = sorted(all_events)
-        return sorted_events
+            source.close()
+
+
+class ConcurrentEventCollector(EventCollector):
+    """
+    Fetches events from all sources in parallel, so the response time matches the slowest source rather than the sum
+    of all of them. Any source which fails, or does not respond within source_timeout seconds, is logged and left out
+    of the results.
+    """
+    def __init__(
+        self,
+        sources: Optional[List[Source]] = None,
+        max_workers: Optional[int] = None,
+        source_timeout: Optional[float] = 30,
+        event_cache: Optional[EventCache] = None,
+        similar_event_deduplicator: Optional[SimilarEventDeduplicator] = None,
+    ) -> None:
+        super().__init__(sources, event_cache, similar_event_deduplicator)
+        self.source_timeout = source_timeout
+        # One worker per source by default, so that every source starts straight away and shares the same deadline
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers or len(self.sources))
+
+    def _iter_sources(
+        self,
+        day: int,
+        month: int,
+        year: Optional[int] = None,
+        types: Optional[Collection[EventType]] = None,
+    ) -> Iterator[Tuple[Source, List[Event]]]:
+        """
+        Yields each source as it finishes. Sources which fail or time out are yielded with no events, so that ordered
+        streams know not to wait for them.
+        """
+        futures = {
+            self.executor.submit(self._fetch_source, source, day, month, year, types): source
+            for source in self.sources
+        }
+        try:
+            for future in concurrent.futures.as_completed(futures, timeout=self.source_timeout):
+                source = futures.pop(future)
+                try:
+                    yield source, future.result()
+                except Exception:
+                    logger.exception("Source %s failed to fetch events", source.name)
+                    yield source, []
+        except concurrent.futures.TimeoutError:
+            for future, source in list(futures.items()):
+                future.cancel()
+                del futures[future]
+                logger.warning("Source %s timed out after %s seconds", source.name, self.source_timeout)
+                yield source, []
+        finally:
+            # Stop any fetches still running if the caller stopped reading early
+            for future in futures:
+                future.cancel()
+
+    def _fetch_date_groups(
+        self,
+        fetches: List[Tuple[Source, List[datetime.date]]],
+        types: Optional[Collection[EventType]] = None,
+        prewarm: bool = False,
+    ) -> List[Dict[datetime.date, List[Event]]]:
+        """
+        Fetches all the groups of dates in parallel. A batch can take many rounds of the workers, so rather than one
+        deadline for all of it, each fetch is left to time out in the HTTP client.
+        """
+        futures = {
+            self.executor.submit(self._fetch_source_dates, source, dates, types, prewarm): source
+            for source, dates in fetches
+        }
+        date_groups = []
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                date_groups.append(future.result())
+            except Exception:
+                logger.exception("Source %s failed to fetch events", futures[future].name)
+        return date_groups
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        super().close()
+
+
+class AsyncEventCollector:
+    """
+    Gathers events from all sources concurrently on a single event loop, using each source's pooled aiohttp session.
+    As with ConcurrentEventCollector, sources which fail or time out are logged and left out of the results.
+    """
+    def __init__(
+        self,
+        sources: Optional[List[Source]] = None,
+        source_timeout: Optional[float] = 30,
+        event_cache: Optional[EventCache] = None,
+        similar_event_deduplicator: Optional[SimilarEventDeduplicator] = None,
+    ) -> None:
+        """
+        :param sources: Which sources to fetch from. Their HTTP clients are left open by close, for their owner to close
+        """
+        # The default sources get a client of their own, which close can shut without cutting off other collectors
+        # using the shared default_http_client. They still share its rate limits
+        self._http: Optional[HttpClient] = None
+        if not sources:
+            self._http = HttpClient(rate_limiter=default_http_client.rate_limiter)
+            sources = [DaysOfTheYearSource(self._http)]
+        self.sources = sources
+        self.source_timeout = source_timeout
+        self.event_cache = event_cache
+        self.similar_event_deduplicator = similar_event_deduplicator
+        # Background refreshes of stale cache entries, by cache key
+        self._refresh_tasks: Dict[Tuple, asyncio.Task] = {}
+
+    async def events_today(
+        self,
+        types: Optional[Collection[EventType]] = None,
+        limit: Optional[int] = None,
+    ) -> List[Event]:
+        t_day = datetime.date.today()
+        return await self.events_on(t_day.day, t_day.month, t_day.year, types=types, limit=limit)
+
+    async def events_on(
+        self,
+        day: int,
+        month: int,
+        year: Optional[int] = None,
+        types: Optional[Collection[EventType]] = None,
+        limit: Optional[int] = None,
+    ) -> List[Event]:
+        sorted_events = merge_sorted_events(await self._fetch_sources(day, month, year, types))
+        return _select_events(sorted_events, limit, self.similar_event_deduplicator)
+
+    async def iter_events(
+        self,
+        day: int,
+        month: int,
+        year: Optional[int] = None,
+        types: Optional[Collection[EventType]] = None,
+        ordered: bool = True,
+    ) -> AsyncIterator[Event]:
+        """
+        Non-blocking version of EventCollector.iter_events
+        """
+        stream = _EventStream(self.sources, ordered)
+        tasks = {
+            asyncio.ensure_future(self._fetch_source(source, day, month, year, types)): source
+            for source in self.sources
+        }
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    for event in stream.add(tasks.pop(task), task.result()):
+                        yield event
+        finally:
+            for task in tasks:
+                # A loser can finish before it sees the cancellation, so release its response once it's done
+                task.add_done_callback(_release_hedged_response)
+                task.cancel()
+
+    async def events_for_dates(
+        self,
+        dates: Iterable[datetime.date],
+        types: Optional[Collection[EventType]] = None,
+        limit: Optional[int] = None,
+    ) -> Dict[datetime.date, List[Event]]:
+        """
+        Non-blocking version of EventCollector.events_for_dates, which fetches every group of dates at once
+        """
+        dates = list(dict.fromkeys(dates))
+        source_events, fetches = _plan_date_fetches(self.sources, self.event_cache, dates, types)
+        for events_by_date in await asyncio.gather(
+            *(self._fetch_source_dates(source, group, types) for source, group in fetches)
+        ):
+            for date, events in events_by_date.items():
+                source_events[date].append(events)
+        return {
+            date: _select_events(merge_sorted_events(source_events[date]), limit, self.similar_event_deduplicator)
+            for date in dates
+        }
+
+    async def events_for_range(
+        self,
+        start: datetime.date,
+        end: datetime.date,
+        types: Optional[Collection[EventType]] = None,
+        limit: Optional[int] = None,
+    ) -> Dict[datetime.date, List[Event]]:
+        return await self.events_for_dates(_date_range(start, end), types, limit)
+
+    async def prewarm(self, dates: Iterable[datetime.date], types: Optional[Collection[EventType]] = None) -> None:
+        """
+        Non-blocking version of EventCollector.prewarm
+        """
+        if self.event_cache is None:
+            raise ValueError("Prewarming needs an event_cache")
+        _, fetches = _plan_date_fetches(self.sources, None, list(dict.fromkeys(dates)), types)
+        await asyncio.gather(*(self._fetch_source_dates(source, group, types, True) for source, group in fetches))
+
+    async def fetch_events(
+        self,
+        day: int,
+        month: int,
+        year: Optional[int] = None,
+        types: Optional[Collection[EventType]] = None,
+    ) -> List[Event]:
+        all_events = []
+        for events in await self._fetch_sources(day, month, year, types):
+            all_events += events
+        return all_events
+
+    async def _fetch_sources(
+        self,
+        day: int,
+        month: int,
+        year: Optional[int] = None,
+        types: Optional[Collection[EventType]] = None,
+    ) -> List[List[Event]]:
+        return await asyncio.gather(
+            *(self._fetch_source(source, day, month, year, types) for source in self.sources)
+        )
+
+    async def _fetch_source(
+        self,
+        source: Source,
+        day: int,
+        month: int,
+        year: Optional[int] = None,
+        types: Optional[Collection[EventType]] = None,
+    ) -> List[Event]:
+        if self.event_cache is not None:
+            cached = self.event_cache.lookup(source, day, month, year, types)
+            if cached is not None:
+                events, stale = cached
+                if stale:
+                    self._refresh_in_background(source, day, month, year, types)
+                return events
+        return await self._refresh_source(source, day, month, year, types)
+
+    def _refresh_in_background(
+        self,
+        source: Source,
+        day: int,
+        month: int,
+        year: Optional[int] = None,
+        types: Optional[Collection[EventType]] = None,
+    ) -> None:
+        key = EventCache._key(source, day, month, year, types)
+        if key in self._refresh_tasks:
+            return
+        task = asyncio.ensure_future(self._refresh_source(source, day, month, year, types))
+        self._refresh_tasks[key] = task
+        task.add_done_callback(lambda _: self._refresh_tasks.pop(key, None))
+
+    async def _refresh_source(
+        self,
+        source: Source,
+        day: int,
+        month: int,
+        year: Optional[int] = None,
+        types: Optional[Collection[EventType]] = None,
+    ) -> List[Event]:
+        try:
+            events = await asyncio.wait_for(
+                source.fetch_events_async(day, month, year, types),
+                self.source_timeout,
+            )
+            events = sorted(events, key=event_order_key)
+        except asyncio.TimeoutError:
+            logger.warning("Source %s timed out after %s seconds", source.name, self.source_timeout)
+            return []
+        except Exception:
+            logger.exception("Source %s failed to fetch events", source.name)
+            return []
+        if self.event_cache is not None:
+            self.event_cache.put(source, day, month, year, types, events)
+        return events
+
+    async def _fetch_source_dates(
+        self,
+        source: Source,
+        dates: List[datetime.date],
+        types: Optional[Collection[EventType]] = None,
+        prewarm: bool = False,
+    ) -> Dict[datetime.date, List[Event]]:
+        try:
+            events_by_date = await asyncio.wait_for(
+                source.fetch_events_for_dates_async(dates, types),
+                self.source_timeout,
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Source %s timed out after %s seconds", source.name, self.source_timeout)
+            return {}
+        except Exception:
+            logger.exception("Source %s failed to fetch events", source.name)
+            return {}
+        for date, events in events_by_date.items():
+            events = events_by_date[date] = sorted(events, key=event_order_key)
+            if self.event_cache is not None:
+                ttl = _prewarm_ttl(source, date) if prewarm else None
+                self.event_cache.put(source, date.day, date.month, date.year, types, events, ttl)
+        return events_by_date
+
+    async def close(self) -> None:
+        for task in list(self._refresh_tasks.values()):
+            task.cancel()
+        for source in self.sources:
+            source.close()
+        if self._http is not None:
+            await self._http.close_async()
+            self._http.close()
+
+    async def __aenter__(self) -> AsyncEventCollector:
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+
+class PrewarmScheduler:
+    """
+    Prewarms a collector's event cache every evening, fetching the next days' events a few hours before local
+    midnight, so that the first requests each morning are served from the cache rather than waiting on every source.
+    An EventCollector is prewarmed from a background thread, and an AsyncEventCollector from a task on the running
+    event loop
+    """
+    def __init__(
+        self,
+        collector: Union[EventCollector, AsyncEventCollector],
+        hours_before_midnight: float = 3,
+        days_ahead: int = 1,
+        types: Optional[Collection[EventType]] = None,
+    ) -> None:
+        """
+        :param hours_before_midnight: How long before local midnight to prewarm, between 0 and 24
+        :param days_ahead: How many days to prewarm, starting from tomorrow
+        :param types: Which types of event to prewarm, the same as will be asked for in the morning
+        """
+        if not isinstance(collector, (EventCollector, AsyncEventCollector)):
+            raise TypeError(f"Only an EventCollector or AsyncEventCollector can be prewarmed, not {collector!r}")
+        if collector.event_cache is None:
+            raise ValueError("Prewarming needs a collector with an event_cache")
+        if not 0 <= hours_before_midnight <= 24:
+            raise ValueError(f"hours_before_midnight must be between 0 and 24, not {hours_before_midnight}")
+        if days_ahead < 1:
+            raise ValueError(f"days_ahead must be at least 1, not {days_ahead}")
+        self.collector = collector
+        self.hours_before_midnight = hours_before_midnight
+        self.days_ahead = days_ahead
+        self.types = types
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def next_run(self, now: Optional[datetime.datetime] = None) -> datetime.datetime:
+        """
+        The next local time to prewarm at, after now
+        """
+        now = now or datetime.datetime.now()
+        midnight = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time.min)
+        run_time = midnight - datetime.timedelta(hours=self.hours_before_midnight)
+        if run_time <= now:
+            run_time += datetime.timedelta(days=1)
+        return run_time
+
+    def run_once(self, today: Optional[datetime.date] = None) -> None:
+        """
+        Prewarms the days after today straight away
+        """
+        if not isinstance(self.collector, EventCollector):
+            raise TypeError("An AsyncEventCollector has to be prewarmed with run_once_async")
+        self.collector.prewarm(self._dates_after(today), self.types)
+
+    async def run_once_async(self, today: Optional[datetime.date] = None) -> None:
+        """
+        Non-blocking version of run_once, for an AsyncEventCollector
+        """
+        if not isinstance(self.collector, AsyncEventCollector):
+            raise TypeError("An EventCollector has to be prewarmed with run_once")
+        await self.collector.prewarm(self._dates_after(today), self.types)
+
+    def start(self) -> None:
+        """
+        Starts prewarming every evening, in a background thread or, for an AsyncEventCollector, in a task on the
+        running event loop
+        """
+        if self._thread is not None or self._task is not None:
+            return
+        self._stopped.clear()
+        if isinstance(self.collector, AsyncEventCollector):
+            self._task = asyncio.get_running_loop().create_task(self._run_async())
+        else:
+            self._thread = threading.Thread(target=self._run, name="prewarm-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _dates_after(self, today: Optional[datetime.date]) -> List[datetime.date]:
+        today = today or datetime.date.today()
+        dates = [today + datetime.timedelta(days=n) for n in range(1, self.days_ahead + 1)]
+        logger.info("Prewarming events from %s to %s", dates[0], dates[-1])
+        return dates
+
+    def _day_before(self, run_time: datetime.datetime) -> datetime.date:
+        # Count the days from the one ending at the midnight this run was for, even if it woke late
+        midnight = run_time + datetime.timedelta(hours=self.hours_before_midnight)
+        return midnight.date() - datetime.timedelta(days=1)
+
+    def _run(self) -> None:
+        while True:
+            run_time = self.next_run()
+            if self._stopped.wait((run_time - datetime.datetime.now()).total_seconds()):
+                return
+            try:
+                self.run_once(self._day_before(run_time))
+            except Exception:
+                logger.exception("Prewarming events failed")
+
+    async def _run_async(self) -> None:
+        while True:
+            run_time = self.next_run()
+            await asyncio.sleep(max(0.0, (run_time - datetime.datetime.now()).total_seconds()))
+            try:
+                await self.run_once_async(self._day_before(run_time))
+            except Exception:
+                logger.exception("Prewarming events failed")
+
+
+class EventIndex:
+    """
+    Precomputed, sorted events for every day of the year, so that looking up a day is a dictionary read rather than a
+    live scrape of every source.
+    """
+    def __init__(self, events_by_day: Dict[Tuple[int, int], List[Event]]) -> None:
+        self.events_by_day = events_by_day
+
+    @staticmethod
+    def calendar_days() -> List[Tuple[int, int]]:
+        """
+        Every (month, day) pair in the year, including 29th February
+        """
+        # 2000 was a leap year
+        start = datetime.date(2000, 1, 1)
+        return [(date.month, date.day) for date in (start + datetime.timedelta(days=n) for n in range(366))]
+
+    @classmethod
+    def build(cls, collector: EventCollector, year: Optional[int] = None, max_workers: int = 4) -> EventIndex:
+        """
+        Fetches every day of the year from all of the collector's sources, fetching max_workers days at a time
+        """
+        def build_day(month: int, day: int) -> List[Event]:
+            # The 29th February does not exist in most years
+            if year is not None and not calendar.isleap(year) and (month, day) == (2, 29):
+                return []
+            return collector.events_on(day, month, year)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                (month, day): executor.submit(build_day, month, day)
+                for month, day in cls.calendar_days()
+            }
+            events_by_day = {month_day: future.result() for month_day, future in futures.items()}
+        return cls(events_by_day)
+
+    def events_on(self, day: int, month: int) -> List[Event]:
+        return self.events_by_day.get((month, day), [])
+
+    def save(self, path: str) -> None:
+        data = {
+            f"{month:02}-{day:02}": [event.to_dict() for event in events]
+            for (month, day), events in self.events_by_day.items()
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, sources: List[Source]) -> EventIndex:
+        sources_by_name = {source.name: source for source in sources}
+        with open(path, "r") as f:
+            data = json.load(f)
+        events_by_day = {}
+        for month_day, event_dicts in data.items():
+            month, day = (int(part) for part in month_day.split("-"))
+            events = []
+            for event_dict in event_dicts:
+                source = sources_by_name.get(event_dict["source"])
+                if source is None:
+                    logger.warning("Skipping event from unknown source %s", event_dict["source"])
+                    continue
+                events.append(Event.from_dict(event_dict, source))
+            events_by_day[(month, day)] = events
+        return cls(events_by_day)
+
+
+class EventStore:
+    """
+    Persistent SQLite store of events, indexed by calendar day, event type and source, so that days can be answered
+    from local storage rather than by fetching from the sources.
+    """
+    # The primary key leads with (month, day), so doubles as the index for looking up a calendar day
+    schema = [
+        """CREATE TABLE IF NOT EXISTS events (
+            source TEXT NOT NULL,
+            month INTEGER NOT NULL,
+            day INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            end_date TEXT,
+            title TEXT NOT NULL,
+            link TEXT NOT NULL,
+            type TEXT NOT NULL,
+            PRIMARY KEY (month, day, source, title, link)
+        )""",
+        "CREATE INDEX IF NOT EXISTS events_type ON events (type, month, day)",
+        "CREATE INDEX IF NOT EXISTS events_source ON events (source, month, day)",
+    ]
+
+    def __init__(self, path: str, sources: List[Source]) -> None:
+        self.path = path
+        self.sources_by_name = {source.name: source for source in sources}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            for statement in self.schema:
+                self._conn.execute(statement)
+
+    def upsert_events(self, day: int, month: int, events: List[Event]) -> None:
+        """
+        Stores the events fetched for the given calendar day, updating any which are already stored
+        """
+        rows = [
+            {**event.to_dict(), "month": month, "day": day}
+            for event in events
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO events (source, month, day, date, end_date, title, link, type) "
+                "VALUES (:source, :month, :day, :date, :end_date, :title, :link, :type) "
+                "ON CONFLICT (month, day, source, title, link) DO UPDATE SET "
+                "date = excluded.date, end_date = excluded.end_date, type = excluded.type",
+                rows,
+            )
+
+    def events_on(
+        self,
+        day: int,
+        month: int,
+        types: Optional[Collection[EventType]] = None,
+        sources: Optional[Collection[Source]] = None,
+    ) -> List[Event]:
+        """
+        Returns the sorted events stored for the given calendar day, optionally only those of the given types or from
+        the given sources
+        """
+        query = "SELECT * FROM events WHERE month = ? AND day = ?"
+        params: List[Any] = [month, day]
+        if types is not None:
+            query += f" AND type IN ({', '.join('?' for _ in types)})"
+            params += [event_type.name for event_type in types]
+        if sources is not None:
+            query += f" AND source IN ({', '.join('?' for _ in sources)})"
+            params += [source.name for source in sources]
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        events = []
+        for row in rows:
+            source = self.sources_by_name.get(row["source"])
+            if source is None:
+                logger.warning("Skipping event from unknown source %s", row["source"])
+                continue
+            events.append(Event.from_dict(dict(row), source))
+        return sorted(events, key=event_order_key)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
 
 
 if __name__ == "__main__":
-    collector = EventCollector()
-    events_today = collector.events_today()
-    print(f"Found {len(events_today)} events for today:")
-    for e in collector.events_today():
+    collector = ConcurrentEventCollector()
+    t_day = datetime.date.today()
+    event_count = 0
+    for e in collector.iter_events(t_day.day, t_day.month, t_day.year):
         print(e)
+        event_count += 1
+    print(f"Found {event_count} events for today")
+    collector.close()
@@ -0,0 +1,428 @@
+"""
+Tests for the parts of main.py which don't need network access, run with `python -m pytest`
+"""
+import asyncio
+import datetime
+import itertools
+import json
+import random
+import threading
+import time
+
+import pytest
+
+import main
+from main import JsonArrayStreamDecoder, RateLimiter, _parse_card_date
+
+
+def random_value(rng: random.Random, depth: int = 0):
+    choice = rng.randrange(7 if depth < 2 else 4)
+    if choice == 0:
+        return rng.choice([0, -1, 7, 123456789, -4e-7, 2.5e10, 3.14159, -0.0])
+    if choice == 1:
+        return rng.choice(["", "plain", 'quote " and \\ backslash', "café", "☃ snow", "\U0001f389 party"])
+    if choice == 2:
+        return rng.choice([True, False, None])
+    if choice == 3:
+        return rng.randrange(-10 ** 6, 10 ** 6) / rng.choice([1, 7, 1000])
+    if choice == 4:
+        return [random_value(rng, depth + 1) for _ in range(rng.randrange(4))]
+    return {f"k{n}": random_value(rng, depth + 1) for n in range(rng.randrange(4))}
+
+
+def random_document(rng: random.Random) -> dict:
+    document = {}
+    for n in range(rng.randrange(1, 6)):
+        if rng.random() < 0.75:
+            document[f"section{n}"] = [random_value(rng) for _ in range(rng.randrange(6))]
+        else:
+            # Values which aren't arrays are skipped
+            document[f"other{n}"] = random_value(rng)
+    return document
+
+
+def expected_elements(document: dict) -> list:
+    return [(key, element) for key, value in document.items() if isinstance(value, list) for element in value]
+
+
+def decode_in_chunks(data: bytes, split_points: list) -> list:
+    decoder = JsonArrayStreamDecoder()
+    elements = []
+    start = 0
+    for end in split_points + [len(data)]:
+        elements += decoder.feed(data[start:end])
+        start = end
+    return elements + decoder.close()
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_decoder_matches_json_loads_with_random_chunks(seed):
+    rng = random.Random(seed)
+    document = random_document(rng)
+    data = json.dumps(document, ensure_ascii=rng.random() < 0.5, indent=rng.choice([None, 2])).encode()
+    split_points = sorted(rng.sample(range(1, len(data)), min(len(data) - 1, rng.randrange(1, 20))))
+    assert decode_in_chunks(data, split_points) == expected_elements(json.loads(data))
+
+
+def test_decoder_one_byte_at_a_time():
+    document = {"events": [{"year": 1876, "text": "café \U0001f389"}, -4e-7, 12345, [1, [2]]], "n": 5}
+    data = json.dumps(document, ensure_ascii=False).encode()
+    assert decode_in_chunks(data, list(range(1, len(data)))) == expected_elements(document)
+
+
+@pytest.mark.parametrize("number", ["0", "-4", "-4e5", "-4.25e-10", "123456789", "1.5E+3"])
+def test_decoder_numbers_split_across_chunks(number):
+    data = f'{{"values": [{number}, {number}]}}'.encode()
+    expected = [("values", json.loads(number))] * 2
+    for split in range(1, len(data)):
+        assert decode_in_chunks(data, [split]) == expected, split
+
+
+def test_decoder_returns_elements_as_soon_as_they_are_complete():
+    decoder = JsonArrayStreamDecoder()
+    assert decoder.feed(b'{"births": [{"year": 1') == []
+    assert decoder.feed(b'900}, {"year"') == [("births", {"year": 1900})]
+    assert decoder.feed(b": 2000}]}") == [("births", {"year": 2000})]
+    assert decoder.close() == []
+
+
+def test_decoder_rejects_truncated_document():
+    decoder = JsonArrayStreamDecoder()
+    decoder.feed(b'{"events": [1, 2')
+    with pytest.raises(ValueError):
+        decoder.close()
+
+
+@pytest.mark.parametrize("date_text, expected", [
+    ("Tue Aug 2nd, 2022", (datetime.date(2022, 8, 2), None)),
+    ("Tuesday August 2nd, 2022", (datetime.date(2022, 8, 2), None)),
+    ("Thu Sept 1st, 2022", (datetime.date(2022, 9, 1), None)),
+    ("  Sat Jan 21st, 2023  ", (datetime.date(2023, 1, 21), None)),
+    ("Aug 22, 2022", (datetime.date(2022, 8, 22), None)),
+    ("Thu Jul 28th, 2022 - Sat Aug 6th, 2022", (datetime.date(2022, 7, 28), datetime.date(2022, 8, 6))),
+    ("Thu Sep 15th, 2022 - Sat Oct 15th, 2022", (datetime.date(2022, 9, 15), datetime.date(2022, 10, 15))),
+    ("August, 2022", (datetime.date(2022, 8, 1), datetime.date(2022, 8, 31))),
+    ("February 2024", (datetime.date(2024, 2, 1), datetime.date(2024, 2, 29))),
+    ("February, 2023", (datetime.date(2023, 2, 1), datetime.date(2023, 2, 28))),
+    # Not in a format the patterns know, so left to dateutil
+    ("2022-08-02", (datetime.date(2022, 8, 2), None)),
+])
+def test_parse_card_date(date_text, expected):
+    assert _parse_card_date(date_text) == expected
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake_clock = FakeClock()
+    monkeypatch.setattr(main.time, "monotonic", fake_clock.monotonic)
+    return fake_clock
+
+
+def test_rate_limiter_allows_burst_then_spaces_requests(clock):
+    limiter = RateLimiter(rate=10, burst=3)
+    waits = [limiter.reserve("https://example.com/a") for _ in range(6)]
+    assert waits == pytest.approx([0, 0, 0, 0.1, 0.2, 0.3])
+
+
+def test_rate_limiter_refills_while_idle(clock):
+    limiter = RateLimiter(rate=10, burst=3)
+    for _ in range(3):
+        limiter.reserve("https://example.com/a")
+    clock.now += 0.1
+    assert limiter.reserve("https://example.com/a") == pytest.approx(0)
+    assert limiter.reserve("https://example.com/a") == pytest.approx(0.1)
+    clock.now += 10
+    assert [limiter.reserve("https://example.com/a") for _ in range(4)] == pytest.approx([0, 0, 0, 0.1])
+
+
+def test_rate_limiter_keeps_hosts_separate(clock):
+    limiter = RateLimiter(rate=1, burst=1, host_rates={"slow.example.com": (0.5, 1)})
+    assert limiter.reserve("https://example.com/a") == 0
+    assert limiter.reserve("https://example.com/b") == pytest.approx(1)
+    assert limiter.reserve("https://other.example.com/a") == 0
+    assert limiter.reserve("https://slow.example.com/a") == 0
+    assert limiter.reserve("https://slow.example.com/b") == pytest.approx(2)
+
+
+def test_rate_limiter_serves_queued_requests_in_order(clock):
+    limiter = RateLimiter(rate=5, burst=2)
+    waits = []
+    for _ in range(20):
+        waits.append(limiter.reserve("https://example.com/a"))
+        clock.now += 0.01
+    send_times = [clock.now - 0.01 * (20 - n) + wait for n, wait in enumerate(waits)]
+    assert send_times == sorted(send_times)
+    # Once the burst is used, requests go out at the rate
+    assert [b - a for a, b in zip(send_times[2:], send_times[3:])] == pytest.approx([0.2] * 17)
+
+
+def test_rate_limiter_holds_host_after_retry_after(clock):
+    limiter = RateLimiter(rate=10, burst=5, max_retry_after=60)
+    limiter.hold("https://example.com/a", 2)
+    assert limiter.reserve("https://example.com/b") == pytest.approx(2)
+    assert limiter.reserve("https://other.example.com/a") == 0
+    limiter.hold("https://example.com/a", 3600)
+    assert limiter.reserve("https://example.com/c") == pytest.approx(60)
+
+
+def test_resolve_date_picks_next_occurrence():
+    today = datetime.date.today()
+    assert main.Source._resolve_date(today.day, today.month) == today
+    tomorrow = today + datetime.timedelta(days=1)
+    assert main.Source._resolve_date(tomorrow.day, tomorrow.month) == tomorrow
+    yesterday = today - datetime.timedelta(days=1)
+    if (yesterday.month, yesterday.day) != (2, 29):
+        assert main.Source._resolve_date(yesterday.day, yesterday.month) == yesterday.replace(year=yesterday.year + 1)
+    assert main.Source._resolve_date(3, 4, 1999) == datetime.date(1999, 4, 3)
+
+
+def test_resolve_date_rolls_29th_february_to_a_leap_year():
+    date = main.Source._resolve_date(29, 2)
+    assert (date.month, date.day) == (2, 29)
+    assert date >= datetime.date.today()
+    assert date.year - datetime.date.today().year < 8
+
+
+@pytest.mark.parametrize("day, month", [(31, 4), (30, 2), (32, 1), (1, 13), (0, 5)])
+def test_resolve_date_rejects_impossible_dates(day, month):
+    with pytest.raises(ValueError):
+        main.Source._resolve_date(day, month)
+
+
+class FakeSource(main.Source):
+    def __init__(self, weight: int = 10, titles: tuple = (), delay: float = 0) -> None:
+        super().__init__()
+        self._weight = weight
+        self.titles = titles
+        self.delay = delay
+
+    @property
+    def weight(self) -> int:
+        return self._weight
+
+    def make_events(self, day, month, year=None):
+        date = self._resolve_date(day, month, year)
+        events = [main.Event(self, date, title, f"https://example.com/{title}", main.EventType.NATIONAL_DAY)
+                  for title in self.titles]
+        return sorted(events, key=main.event_order_key)
+
+    def fetch_events(self, day, month, year=None, types=None):
+        time.sleep(self.delay)
+        return self.make_events(day, month, year)
+
+    async def fetch_events_async(self, day, month, year=None, types=None):
+        await asyncio.sleep(self.delay)
+        return self.make_events(day, month, year)
+
+
+def test_deduplicator_compares_every_pair_in_a_bucket(monkeypatch):
+    # All three share the first band, but only the last two are similar enough to merge
+    signatures = {"Alpha": (1, 1, 8, 9), "Beta": (1, 1, 2, 3), "Gamma": (1, 1, 2, 4)}
+    deduplicator = main.SimilarEventDeduplicator(threshold=0.75, bands=2, rows=2)
+    monkeypatch.setattr(deduplicator, "_signature", signatures.get)
+    source = FakeSource()
+    date = datetime.date(2022, 8, 2)
+    events = [main.Event(source, date, title, "", main.EventType.NATIONAL_DAY) for title in signatures]
+    assert [event.title for event in deduplicator.deduplicate(events)] == ["Alpha", "Beta"]
+
+
+def stream_sources():
+    # Equal weights, mixed weights and events listed by more than one source
+    return [
+        FakeSource(1, ("Bread", "Zebra")),
+        FakeSource(5, ("Apple", "Bread", "Mango")),
+        FakeSource(5, ("Apple", "Kiwi")),
+        FakeSource(10, ("Aardvark", "Mango", "Yak")),
+    ]
+
+
+@pytest.mark.parametrize("arrival_order", list(itertools.permutations(range(4))))
+def test_event_stream_matches_sorted_events_whatever_order_sources_arrive_in(arrival_order):
+    sources = stream_sources()
+    stream = main._EventStream(sources)
+    streamed = []
+    for index in arrival_order:
+        streamed += stream.add(sources[index], sources[index].make_events(2, 8, 2022))
+    assert streamed == main.EventCollector(sources).events_on(2, 8, 2022)
+
+
+def test_event_stream_passes_on_events_once_no_earlier_ones_can_arrive():
+    sources = stream_sources()
+    stream = main._EventStream(sources)
+    assert stream.add(sources[3], sources[3].make_events(2, 8, 2022)) == []
+    assert stream.add(sources[1], sources[1].make_events(2, 8, 2022)) == []
+    assert [event.title for event in stream.add(sources[0], sources[0].make_events(2, 8, 2022))] == ["Bread", "Zebra"]
+    assert [event.title for event in stream.add(sources[2], sources[2].make_events(2, 8, 2022))] == [
+        "Apple", "Kiwi", "Mango", "Aardvark", "Yak",
+    ]
+
+
+def test_unordered_event_stream_passes_on_first_arrivals():
+    sources = stream_sources()
+    stream = main._EventStream(sources, ordered=False)
+    streamed = []
+    for index in (3, 2, 1, 0):
+        streamed += stream.add(sources[index], sources[index].make_events(2, 8, 2022))
+    assert [(event.source.weight, event.title) for event in streamed] == [
+        (10, "Aardvark"), (10, "Mango"), (10, "Yak"), (5, "Apple"), (5, "Kiwi"), (5, "Bread"), (1, "Zebra"),
+    ]
+    assert streamed[3].source is sources[2]
+
+
+def test_iter_events_matches_events_on():
+    sources = stream_sources()
+    # The best weighted sources are the slowest, so they arrive last
+    for source, delay in zip(sources, (0.06, 0.04, 0.02, 0)):
+        source.delay = delay
+    collector = main.ConcurrentEventCollector(sources)
+    try:
+        assert list(collector.iter_events(2, 8, 2022)) == collector.events_on(2, 8, 2022)
+        assert list(main.EventCollector(sources).iter_events(2, 8, 2022)) == collector.events_on(2, 8, 2022)
+    finally:
+        collector.close()
+
+
+def test_async_iter_events_matches_events_on():
+    async def collect():
+        sources = stream_sources()
+        for source, delay in zip(sources, (0.06, 0.04, 0.02, 0)):
+            source.delay = delay
+        async with main.AsyncEventCollector(sources) as collector:
+            return [event async for event in collector.iter_events(2, 8, 2022)], await collector.events_on(2, 8, 2022)
+
+    streamed, events = asyncio.run(collect())
+    assert streamed == events
+
+
+class RefreshingSource(FakeSource):
+    # Returns a new version of its one event each time it is fetched, and can be held back or made to fail
+    def __init__(self) -> None:
+        super().__init__()
+        self.fetches = 0
+        self.release = threading.Event()
+        self.release.set()
+        self.fail = False
+
+    def fetch_events(self, day, month, year=None, types=None):
+        self.fetches += 1
+        version = self.fetches
+        assert self.release.wait(5)
+        if self.fail:
+            raise ConnectionError("Source is down")
+        self.titles = (f"Version {version}",)
+        return self.make_events(day, month, year)
+
+
+def wait_for_refreshes(collector: main.EventCollector) -> None:
+    deadline = time.perf_counter() + 5
+    while collector._refreshing:
+        assert time.perf_counter() < deadline
+        time.sleep(0.001)
+
+
+@pytest.fixture
+def stale_collector(clock):
+    source = RefreshingSource()
+    collector = main.EventCollector([source], event_cache=main.EventCache(max_stale=datetime.timedelta(hours=1)))
+    assert [event.title for event in collector.events_on(2, 8, 2022)] == ["Version 1"]
+    yield collector, source
+    source.release.set()
+    collector.close()
+
+
+def test_stale_hit_returns_straight_away_and_refreshes_once(stale_collector, clock):
+    collector, source = stale_collector
+    clock.now += source.cache_ttl.total_seconds() + 1
+    source.release.clear()
+    # The refresh is held back, so these would hang if they waited for it
+    for _ in range(3):
+        assert [event.title for event in collector.events_on(2, 8, 2022)] == ["Version 1"]
+    source.release.set()
+    wait_for_refreshes(collector)
+    assert source.fetches == 2
+    assert [event.title for event in collector.events_on(2, 8, 2022)] == ["Version 2"]
+    assert source.fetches == 2
+
+
+def test_failed_refresh_keeps_stale_events(stale_collector, clock):
+    collector, source = stale_collector
+    clock.now += source.cache_ttl.total_seconds() + 1
+    source.fail = True
+    assert [event.title for event in collector.events_on(2, 8, 2022)] == ["Version 1"]
+    wait_for_refreshes(collector)
+    assert source.fetches == 2
+    assert collector.event_cache.lookup(source, 2, 8, 2022)[0][0].title == "Version 1"
+    assert [event.title for event in collector.events_on(2, 8, 2022)] == ["Version 1"]
+
+
+def test_events_past_max_stale_are_fetched_again(stale_collector, clock):
+    collector, source = stale_collector
+    clock.now += (source.cache_ttl + collector.event_cache.max_stale).total_seconds() + 1
+    assert [event.title for event in collector.events_on(2, 8, 2022)] == ["Version 2"]
+    assert not collector._refreshing
+    assert source.fetches == 2
+
+
+def day_card(date_text: str, title: str) -> str:
+    return (
+        f'<div class="card card--day"><div class="card__date"><div class="date_day">{date_text}</div></div>'
+        f'<div class="card__title heading"><a href="https://example.com/{title}">{title}</a></div></div>'
+    )
+
+
+class FakeHttpClient(main.HttpClient):
+    def __init__(self, pages: dict) -> None:
+        super().__init__()
+        self.pages = pages
+        self.requested = []
+
+    def get(self, url, stream=False):
+        self.requested.append(url)
+        return main.HttpResponse(url, self.pages[url].encode(), "utf-8")
+
+
+def test_days_of_the_year_groups_dates_by_month():
+    dates = [
+        datetime.date(2022, 8, 30), datetime.date(2022, 9, 2), datetime.date(2022, 8, 2), datetime.date(2023, 8, 2),
+    ]
+    assert main.DaysOfTheYearSource().group_dates(dates) == [[dates[0], dates[2]], [dates[1]], [dates[3]]]
+
+
+def test_days_of_the_year_splits_month_page_between_dates():
+    spanning_week = day_card("Mon Aug 29th, 2022 - Sat Sep 3rd, 2022", "Spanning Week")
+    http = FakeHttpClient({
+        "https://www.daysoftheyear.com/days/2022/08/": "<html><body>" + "".join([
+            day_card("Thu Jul 28th, 2022 - Sat Aug 6th, 2022", "Late July Week"),
+            day_card("August, 2022", "August Month"),
+            day_card("Tue Aug 2nd, 2022", "Second Day"),
+            day_card("Tue Aug 30th, 2022", "Thirtieth Day"),
+            spanning_week,
+        ]) + "</body></html>",
+        "https://www.daysoftheyear.com/days/2022/09/02/": "<html><body>" + "".join([
+            day_card("Fri Sep 2nd, 2022", "September Day"),
+            spanning_week,
+        ]) + "</body></html>",
+    })
+    source = main.DaysOfTheYearSource(http)
+    dates = [datetime.date(2022, 8, day) for day in (2, 7, 30)] + [datetime.date(2022, 9, 2)]
+    events_by_date = source.fetch_events_for_dates(dates)
+    # The lone September date uses its day page rather than the whole month's
+    assert http.requested == [
+        "https://www.daysoftheyear.com/days/2022/08/",
+        "https://www.daysoftheyear.com/days/2022/09/02/",
+    ]
+    assert {date: sorted(event.title for event in events) for date, events in events_by_date.items()} == {
+        datetime.date(2022, 8, 2): ["August Month", "Late July Week", "Second Day"],
+        datetime.date(2022, 8, 7): ["August Month"],
+        datetime.date(2022, 8, 30): ["August Month", "Spanning Week", "Thirtieth Day"],
+        datetime.date(2022, 9, 2): ["September Day", "Spanning Week"],
+    }
+    assert source.fetch_events_for_dates(dates, [main.EventType.BIRTH]) == {date: [] for date in dates}